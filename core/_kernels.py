@@ -0,0 +1,132 @@
+# core/_kernels.py
+"""
+Single-pass numeric kernels used by the Analyzer and Engine.run_vectorized()
+Compiled with Numba when it is installed (cache=True → compiled once, reused across runs),
+otherwise they run as plain Python functions with identical results.
+
+Numba cache: the first-ever run writes the machine code next to this file
+(__pycache__/_kernels.*.nbi/.nbc, or under $NUMBA_CACHE_DIR); later processes load it
+instead of compiling. warmup() forces that compile/load before the first bar.
+"""
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:  # Numba is optional
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit — supports both @njit and @njit(...)"""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+@njit(cache=True)
+def equity_stats(equity: np.ndarray):
+    """
+    Fused single scan over the equity curve → (max_drawdown, mean_return, std_return, n_returns)
+    - max_drawdown: worst (equity - running peak) / running peak, as a negative fraction
+    - mean/std of bar-to-bar simple returns via Welford's algorithm (std uses ddof=1)
+    Equivalent to cummax/drawdown.min() plus pct_change().mean()/.std(), without temporaries
+    """
+    peak = equity[0]
+    min_dd = 0.0
+    mean = 0.0
+    m2 = 0.0
+    n = 0
+    prev = equity[0]
+    for i in range(equity.size):
+        e = equity[i]
+        if e > peak:
+            peak = e
+        dd = (e - peak) / peak
+        if dd < min_dd:
+            min_dd = dd
+
+        if i > 0:
+            r = (e - prev) / prev
+            n += 1
+            delta = r - mean
+            mean += delta / n
+            m2 += delta * (r - mean)
+        prev = e
+
+    std = np.sqrt(m2 / (n - 1)) if n > 1 else 0.0
+    return min_dd, mean, std, n
+
+
+@njit(cache=True)
+def simulate_signals(
+    close: np.ndarray,
+    entries: np.ndarray,
+    exits: np.ndarray,
+    initial_cash: float,
+    min_trade_size: float,
+    qty: float
+):
+    """
+    Vectorized-backtest core: replays boolean entry/exit signals bar by bar
+    Mirrors Portfolio semantics — fills at close, buy only when flat (capped by cash),
+    exit sells the whole position, exits are processed before entries on the same bar,
+    any open position is closed at the last close (like Strategy.on_end)
+
+    Returns (equity, trade_idx, trade_side, trade_size, trade_price, cash, position)
+    trade_side: 0 = BUY, 1 = SELL; trade_idx = bar index of the fill
+    """
+    n = close.size
+    equity = np.empty(n, dtype=np.float64)
+    tr_idx = np.empty(2 * n + 1, dtype=np.int64)
+    tr_side = np.empty(2 * n + 1, dtype=np.int8)
+    tr_size = np.empty(2 * n + 1, dtype=np.float64)
+    tr_price = np.empty(2 * n + 1, dtype=np.float64)
+
+    cash = initial_cash
+    position = 0.0
+    k = 0
+    for i in range(n):
+        price = close[i]
+        if exits[i] and position >= min_trade_size and price > 0.0:
+            cash += position * price
+            tr_idx[k] = i
+            tr_side[k] = 1
+            tr_size[k] = position
+            tr_price[k] = price
+            k += 1
+            position = 0.0
+
+        if entries[i] and position == 0.0 and price > 0.0:
+            size = min(qty, cash / price)
+            if size >= min_trade_size:
+                cash -= size * price
+                position = size
+                tr_idx[k] = i
+                tr_side[k] = 0
+                tr_size[k] = size
+                tr_price[k] = price
+                k += 1
+
+        equity[i] = cash + position * price
+
+    if n > 0 and position >= min_trade_size:
+        price = close[n - 1]
+        cash += position * price
+        tr_idx[k] = n - 1
+        tr_side[k] = 1
+        tr_size[k] = position
+        tr_price[k] = price
+        k += 1
+        position = 0.0
+
+    return equity, tr_idx[:k], tr_side[:k], tr_size[:k], tr_price[:k], cash, position
+
+
+def warmup() -> None:
+    """
+    Call every kernel above once on float64 dummies of shape 32, with the argument types
+    the Engine/Analyzer pass → compile (or cache load) now, not inside a backtest
+    """
+    dummy = np.ones(32, dtype=np.float64)
+    flags = np.zeros(32, dtype=np.bool_)
+    equity = dummy.copy()
+    equity.flags.writeable = False  # Analyzer passes the read-only equity column (own signature)
+    equity_stats(equity)
+    simulate_signals(dummy, flags, flags, 100_000.0, 0.1, 100.0)
@@ -1,150 +1,217 @@
 # core/analyzer.py
-from typing import Dict, Any, Optional
+from functools import cached_property
+from typing import Dict, Any, Optional, Tuple
 import pandas as pd
 import numpy as np
 
-from core.portfolio import Portfolio
+from core.portfolio import Portfolio, TRADE_BUY, equity_frame
+from core._kernels import equity_stats
 from database.schema import Bar
 
+SECONDS_PER_YEAR = 60 * 60 * 24 * 365.25  # 31_557_600
+
+# Keys of Analyzer.metrics that are lazy metric properties (rest: symbol, strategy, bar_count)
+METRIC_PROPERTIES = (
+    "total_return_pct", "total_equity", "cagr_pct", "sharpe", "volatility_annualized",
+    "max_drawdown_pct", "num_trades", "win_rate_pct", "profit_factor", "years",
+)
+
 
 class Analyzer:
     """
     Post-backtest performance analyzer
-    Calculates all industry-standard metrics:
+    Calculates all industry-standard metrics (lazily, on first access):
     - Total return, CAGR, Sharpe, Max Drawdown, Win Rate, etc.
     - Provides clean equity curve DataFrame
     - Ready for comparison tables and ranking
     """
 
-    def __init__(self, portfolio: Portfolio):
+    def __init__(self, portfolio: Optional[Portfolio]):
         self.portfolio = portfolio
         self.symbol: Optional[str] = None
         self.strategy_name: Optional[str] = None
         self.bar_count: int = 0
 
-        # Self-triggered calculation
-        self._metrics: Dict[str, Any] = {}
-        self._calculate_metrics()
+    @classmethod
+    def from_metrics(
+        cls,
+        metrics: Dict[str, Any],
+        datetimes: np.ndarray,
+        equity: np.ndarray
+    ) -> "Analyzer":
+        """
+        Rebuild a finished Analyzer from its metrics dict + equity arrays (Engine.run_multiple())
+        Every metric and the equity curve are pre-filled; there is no Portfolio behind it
+        (portfolio is None → no trade log; build a full Analyzer via Engine.run() if needed)
+        """
+        analyzer = cls(portfolio=None)
+        analyzer.symbol = metrics["symbol"]
+        analyzer.strategy_name = metrics["strategy"]
+        analyzer.bar_count = metrics["bar_count"]
+        # cached_property values live in the instance __dict__ → pre-seed them directly
+        for name in METRIC_PROPERTIES:
+            analyzer.__dict__[name] = metrics[name]
+        analyzer.__dict__["equity_curve"] = equity_frame(datetimes, equity)
+        return analyzer
 
-    def _calculate_metrics(self) -> None:
-        """Main calculation engine — triggered on initialization"""
-        equity_df = self.portfolio.equity_curve
+    # ------------------------------------------------------------------
+    # Lazy metrics — each one is computed on first access, then cached
+    # (ranking code that only reads total_return_pct never pays for the rest)
+    # ------------------------------------------------------------------
+    @cached_property
+    def _empty(self) -> bool:
+        """No equity history recorded (empty feed) → every metric falls back to its neutral value"""
+        return self.portfolio.history_len == 0
+
+    @cached_property
+    def equity_curve(self) -> pd.DataFrame:
+        """Equity curve built once (backtest is finished) — treat it as read-only"""
+        return self.portfolio.equity_curve
+
+    @cached_property
+    def total_equity(self) -> float:
+        if self._empty:
+            return self.portfolio.initial_cash
+        return round(self.portfolio.total_equity, 2)
+
+    @cached_property
+    def total_return_pct(self) -> float:
+        if self._empty:
+            return 0.0
+        total_return = (self.portfolio.total_equity / self.portfolio.initial_cash) - 1
+        return round(total_return * 100, 3)
+
+    @cached_property
+    def _years_raw(self) -> float:
+        equity_df = self.equity_curve
         if equity_df.empty:
-            self._metrics = {
-                "total_return_pct": 0.0,
-                "total_equity": self.portfolio.initial_cash,
-                "cagr_pct": 0.0,
-                "sharpe": 0.0,
-                "volatility_annualized": 0.0,
-                "max_drawdown_pct": 0.0,
-                "num_trades": 0,
-                "win_rate_pct": 0.0,
-                "profit_factor": 0.0,
-            }
-            return
-
-        # 1. Basic returns
-        initial = self.portfolio.initial_cash
-        final = equity_df["equity"].iloc[-1]
-        total_return = (final / initial) - 1
-        total_return_pct = total_return * 100
-
-        # 2. Time period (in years)
-        start_ms = equity_df.index[0].timestamp() * 1000
-        end_ms = equity_df.index[-1].timestamp() * 1000
-        years = (end_ms - start_ms) / (1000 * 60 * 60 * 24 * 365.25)
-        years = max(years, 1e-6)  # avoid divide by zero
-
-        cagr = (final / initial) ** (1 / years) - 1
-        cagr_pct = cagr * 100
-
-        # 3. Returns series (1-minute)
-        returns = equity_df["equity"].pct_change().dropna()
-
-        # 4. Risk metrics (annualized from 1-minute returns)
-        if len(returns) > 1:
+            return 0.0
+        elapsed = equity_df.index[-1] - equity_df.index[0]  # Timedelta
+        years = elapsed.total_seconds() / SECONDS_PER_YEAR
+        return max(years, 1e-6)  # avoid divide by zero
+
+    @cached_property
+    def years(self) -> float:
+        return round(self._years_raw, 3)
+
+    @cached_property
+    def cagr_pct(self) -> float:
+        if self._empty:
+            return 0.0
+        cagr = (self.portfolio.total_equity / self.portfolio.initial_cash) ** (1 / self._years_raw) - 1
+        return round(cagr * 100, 3)
+
+    @cached_property
+    def _equity_stats(self) -> Tuple[float, float, float, int]:
+        """One fused pass over the equity array: drawdown + 1-minute return mean/std"""
+        if self._empty:
+            return 0.0, 0.0, 0.0, 0
+        return equity_stats(self.equity_curve["equity"].to_numpy(dtype=np.float64))
+
+    @cached_property
+    def _risk(self) -> Tuple[float, float]:
+        """(sharpe, annualized volatility) from 1-minute returns"""
+        _, mean_return, std_return, n_returns = self._equity_stats
+        if n_returns > 1:
             minutes_per_year = 252 * 390  # 390 minutes per trading day
-            mean_return = returns.mean()
-            std_return = returns.std()
 
             volatility_annual = std_return * np.sqrt(minutes_per_year)
             sharpe = (mean_return / std_return) * np.sqrt(minutes_per_year) if std_return > 0 else 0.0
         else:
             volatility_annual = sharpe = 0.0
+        return sharpe, volatility_annual
+
+    @cached_property
+    def sharpe(self) -> float:
+        return round(self._risk[0], 3)
 
-        # 5. Max Drawdown
-        peak = equity_df["equity"].cummax()
-        drawdown = (equity_df["equity"] - peak) / peak
-        max_dd = drawdown.min() * 100  # in percent
+    @cached_property
+    def volatility_annualized(self) -> float:
+        return round(self._risk[1] * 100, 3)
+
+    @cached_property
+    def max_drawdown_pct(self) -> float:
+        return round(self._equity_stats[0] * 100, 3)  # in percent
+
+    @cached_property
+    def _trade_stats(self) -> Tuple[int, float, float]:
+        """(num_trades, win_rate_pct, profit_factor) from the realized P&L of each sell"""
+        if self._empty:
+            return 0, 0.0, 0.0
 
-        # 6. Trade statistics
         trades = self.portfolio.trades
         num_trades = len(trades)
 
         if num_trades > 0:
-            # Calculate realized P&L per trade
-            realized_pnl = []
-            position = 0.0
-            entry_price = 0.0
-
-            for t in trades:
-                if t["type"] == "BUY":
-                    position += t["size"]
-                    entry_price = t["price"]  # simplified
-                elif t["type"] == "SELL":
-                    if position > 0:
-                        pnl = (t["price"] - entry_price) * t["size"]
-                        realized_pnl.append(pnl)
-                        position -= t["size"]
-
-            wins = [p for p in realized_pnl if p > 0]
-            losses = [abs(p) for p in realized_pnl if p <= 0]
-
-            win_rate = len(wins) / len(realized_pnl) * 100 if realized_pnl else 0
-            gross_profit = sum(wins) if wins else 0
-            gross_loss = sum(losses) if losses else 0
+            # Calculate realized P&L per trade (vectorized over the structured trade log)
+            is_buy = trades["side"] == TRADE_BUY
+            size = trades["size"]
+            price = trades["price"]
+
+            # Running position BEFORE each trade → only sells out of a long realize P&L
+            signed_size = np.where(is_buy, size, -size)
+            prior_position = signed_size.cumsum() - signed_size
+
+            # Entry price = most recent BUY price (simplified), forward-filled onto sells
+            last_buy = np.maximum.accumulate(np.where(is_buy, np.arange(num_trades), -1))
+            entry_price = np.where(last_buy >= 0, price[last_buy], 0.0)
+
+            closing = ~is_buy & (prior_position > 0)
+            realized_pnl = (price[closing] - entry_price[closing]) * size[closing]
+
+            wins = realized_pnl[realized_pnl > 0]
+            losses = -realized_pnl[realized_pnl <= 0]
+
+            win_rate = wins.size / realized_pnl.size * 100 if realized_pnl.size else 0
+            gross_profit = wins.sum()
+            gross_loss = losses.sum()
             profit_factor = gross_profit / gross_loss if gross_loss > 0 else np.inf
         else:
             win_rate = profit_factor = 0.0
 
-        # Store everything as dictionary
-        self._metrics = {
-            "symbol": self.symbol,
-            "strategy": self.strategy_name,
-            "total_return_pct": round(total_return_pct, 3),
-            "total_equity": round(final, 2),
-            "cagr_pct": round(cagr_pct, 3),
-            "sharpe": round(sharpe, 3),
-            "volatility_annualized": round(volatility_annual * 100, 3),
-            "max_drawdown_pct": round(max_dd, 3),
-            "num_trades": num_trades,
-            "win_rate_pct": round(win_rate, 2),
-            "profit_factor": round(profit_factor, 3) if np.isfinite(profit_factor) else 0.0,
-            "bar_count": self.bar_count,
-            "years": round(years, 3),
-        }
+        return num_trades, win_rate, profit_factor
+
+    @cached_property
+    def num_trades(self) -> int:
+        return self._trade_stats[0]
+
+    @cached_property
+    def win_rate_pct(self) -> float:
+        return round(self._trade_stats[1], 2)
+
+    @cached_property
+    def profit_factor(self) -> float:
+        profit_factor = self._trade_stats[2]
+        return round(profit_factor, 3) if np.isfinite(profit_factor) else 0.0
 
     # ------------------------------------------------------------------
     # Public properties
     # ------------------------------------------------------------------
     @property
     def metrics(self) -> Dict[str, Any]:
-        self._metrics["symbol"] = self.symbol
-        self._metrics["strategy"] = self.strategy_name
-        self._metrics["bar_count"] = self.bar_count
-        return self._metrics.copy()
-
-    @property
-    def equity_curve(self) -> pd.DataFrame:
-        return self.portfolio.equity_curve.copy()
+        """All metrics as a dictionary (materializes every lazy metric)"""
+        return {
+            "symbol": self.symbol,
+            "strategy": self.strategy_name,
+            "total_return_pct": self.total_return_pct,
+            "total_equity": self.total_equity,
+            "cagr_pct": self.cagr_pct,
+            "sharpe": self.sharpe,
+            "volatility_annualized": self.volatility_annualized,
+            "max_drawdown_pct": self.max_drawdown_pct,
+            "num_trades": self.num_trades,
+            "win_rate_pct": self.win_rate_pct,
+            "profit_factor": self.profit_factor,
+            "bar_count": self.bar_count,
+            "years": self.years,
+        }
 
     # ------------------------------------------------------------------
     # Pretty output
     # ------------------------------------------------------------------
     def summary_table(self) -> pd.DataFrame:
         """One-row DataFrame — perfect for pd.concat() in run_multiple()"""
-        data = self._metrics.copy()
-        return pd.DataFrame([data])
+        return pd.DataFrame([self.metrics])
 
     def print_summary(self) -> None:
         m = self.metrics
@@ -164,5 +231,5 @@ class Analyzer:
         print(f"{'=' * 60}\n")
 
     def __repr__(self) -> str:
-        r = self._metrics.get("total_return_pct", 0.0)
+        r = self.total_return_pct
         return f"<Analyzer {self.symbol} | {self.strategy_name} | {r:+.2f}%>"
\ No newline at end of file
@@ -1,19 +1,30 @@
 # core/engine.py
-from typing import Dict, List, Any, Type, Optional
+from typing import Dict, List, Any, Type, Optional, Tuple
 import logging
-from datetime import datetime
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+import numpy as np
 
 from datafeed.db_feed import BaseFeed
 from database.schema import Bar
 from strategies.base import Strategy
 from core.portfolio import Portfolio
 from core.analyzer import Analyzer
+from core._kernels import simulate_signals
+
+LOG_EVERY_N_BARS = 100_000  # progress log interval in Engine.run()
+LOG_DT_FORMAT = "%Y-%m-%d %H:%M"
+
+logger = logging.getLogger(__name__)
 
 
 class Engine:
     """
     The pure, clean, event-driven backtesting engine
     One Engine = one symbol + one strategy + one backtest run
+    Strategies that implement signals() are run vectorized automatically when the feed has
+    to_arrays() and the params fit max_lookback (use_signals=False → always the event loop)
     """
 
     def __init__(
@@ -22,28 +33,38 @@ class Engine:
         strategy_class: Type[Strategy],
         strategy_params: Optional[Dict[str, Any]] = None,
         initial_cash: float = 100_000.0,
-        min_trade_size: float = 0.1
+        min_trade_size: float = 0.1,
+        use_signals: bool = True
     ):
         self.feed = feed
         self.strategy_class = strategy_class
         self.strategy_params = strategy_params or {}
         self.initial_cash = float(initial_cash)
         self.min_trade_size = float(min_trade_size)
+        self.use_signals = use_signals
 
     def run(self) -> Analyzer:
         """
         Execute full backtest → return complete results
         This is the method you call from run.py or notebooks
+        Dispatches to the vectorized path when strategy.supports_signals (signals() and next()
+        from the same class, params within max_lookback); otherwise the event loop runs
+        Feeds deriving from BaseFeed always have to_arrays(); only duck-typed feeds that
+        merely iterate (no to_arrays()) are kept on the event loop by that check
         """
+        # 1. Initialize strategy and portfolio
+        strategy: Strategy = self.strategy_class(params=self.strategy_params)
+        if self.use_signals and hasattr(self.feed, "to_arrays") and strategy.supports_signals:
+            return self._run_vectorized(strategy)
+
         # Retrieve symbol name from feed for logging
         symbol = getattr(self.feed, "symbol", "UNKNOWN")
-        logging.info(f"Starting backtest: {self.strategy_class.__name__} on {symbol}")
+        logger.info("Starting backtest: %s on %s", self.strategy_class.__name__, symbol)
 
-        # 1. Initialize strategy and portfolio
-        strategy: Strategy = self.strategy_class(params=self.strategy_params)
         portfolio = Portfolio(
             initial_cash=self.initial_cash,
-            min_trade_size=self.min_trade_size
+            min_trade_size=self.min_trade_size,
+            expected_bars=len(self.feed) if hasattr(self.feed, "__len__") else None  # pre-size equity history
         )
 
         # 2. Bind them together
@@ -51,30 +72,44 @@ class Engine:
 
         # 3. Lifecycle: start
         strategy.on_start()
+        warmup_bars = strategy.min_history  # next() would only return early before this many bars
         last_bar: Optional[Bar] = None
         # 4. Main event-driven loop
+        # Hot-path methods bound to locals once (LOAD_FAST instead of attribute lookups per bar)
+        update_bar = strategy.update_bar
+        strategy_next = strategy.next
+        portfolio_update = portfolio.update
+        log_countdown = LOG_EVERY_N_BARS  # countdown instead of a modulo per bar
+        log_enabled = logger.isEnabledFor(logging.INFO)  # checked once; a quiet run never formats
+
         bar_count = 0
         for bar in self.feed:
             bar_count += 1
             last_bar = bar
-            strategy.update_bar(bar)
-            # Strategy decides what to do with this bar
-            strategy.next(bar)
+            portfolio.current_dt = bar.datetime  # trades placed in next() are stamped with this bar
+            strategy.bar_index = bar_count  # update_bar() below + next()'s own call → one push
+            update_bar(bar)
+            # Strategy decides what to do with this bar (history still accumulates during warm-up)
+            if bar_count >= warmup_bars:
+                strategy_next(bar)
 
             # Update equity using latest close price
-            portfolio.update(bar)
+            portfolio_update(bar)
 
             # heads-up logging every 100k bars
-            if bar_count % 100_000 == 0:
-                dt_str = datetime.utcfromtimestamp(bar.datetime / 1000).strftime("%Y-%m-%d %H:%M")
-                logging.info(
-                    f"   → {bar_count:,} bars | {dt_str} | "
-                    f"Equity: ${portfolio.total_equity:,.0f}"
-                )
+            log_countdown -= 1
+            if log_countdown == 0:
+                log_countdown = LOG_EVERY_N_BARS
+                if log_enabled:
+                    dt_str = datetime.fromtimestamp(bar.datetime // 1000, tz=timezone.utc).strftime(LOG_DT_FORMAT)
+                    logger.info(
+                        "   → %s bars | %s | Equity: $%s",
+                        f"{bar_count:,}", dt_str, f"{portfolio.total_equity:,.0f}"
+                    )
 
         #Safety: if feed was empty, set a dummy bar so on_end() can close position
         if bar_count == 0 and last_bar is None:
-            logging.warning(f"No data for {symbol} in date range")
+            logger.warning("No data for %s in date range", symbol)
             # Optionally: create a dummy bar with price=0 or skip
         else:
             # on_end() may want to close position — it can use strategy.bar safely
@@ -89,12 +124,73 @@ class Engine:
         analyzer.strategy_name = strategy.name
         analyzer.bar_count = bar_count
 
-        logging.info(
-            f"Backtest complete | "
-            f"Final equity: ${analyzer.metrics['total_equity']:,.0f} | "
-            f"Total return: {analyzer.metrics['total_return_pct']:.2f}% | "
-            f"Bars: {bar_count:,}"
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Backtest complete | Final equity: $%s | Total return: %.2f%% | Bars: %s",
+                f"{analyzer.total_equity:,.0f}", analyzer.total_return_pct, f"{bar_count:,}"
+            )
+
+        return analyzer
+
+    def run_vectorized(self) -> Analyzer:
+        """
+        Vectorized backtest for strategies that implement signals()
+        Whole feed → NumPy columns → strategy.signals() → one compiled simulation loop
+        No per-bar Python dispatch; fills at close with the strategy's `qty` (default 100)
+        Explicit call → no supports_signals check (see run() for the automatic dispatch)
+        """
+        return self._run_vectorized(self.strategy_class(params=self.strategy_params))
+
+    def _run_vectorized(self, strategy: Strategy) -> Analyzer:
+        """run_vectorized() body for an already constructed strategy (on_start/on_end still run)"""
+        symbol = getattr(self.feed, "symbol", "UNKNOWN")
+        logger.info("Starting vectorized backtest: %s on %s", self.strategy_class.__name__, symbol)
+
+        portfolio = Portfolio(
+            initial_cash=self.initial_cash,
+            min_trade_size=self.min_trade_size
         )
+        strategy.portfolio = portfolio
+
+        # Lifecycle: start (same hook as the event loop)
+        strategy.on_start()
+
+        ts, _open, high, low, close, _volume = self.feed.to_arrays()
+        bar_count = int(ts.size)
+
+        if bar_count == 0:
+            logger.warning("No data for %s in date range", symbol)
+        else:
+            entries, exits = strategy.signals(close, high, low, ts)
+            equity, tr_idx, tr_side, tr_size, tr_price, cash, position = simulate_signals(
+                close,
+                np.ascontiguousarray(entries, dtype=np.bool_),
+                np.ascontiguousarray(exits, dtype=np.bool_),
+                self.initial_cash,
+                self.min_trade_size,
+                float(getattr(strategy, "qty", 100))
+            )
+            portfolio.load_vectorized(ts, equity, tr_idx, tr_side, tr_size, tr_price, cash, position)
+            portfolio.current_dt = int(ts[-1])  # trades placed in on_end() are stamped with the last bar
+            # on_end() may use strategy.bar, as after the event loop
+            strategy.bar = Bar(
+                symbol, int(ts[-1]), float(_open[-1]), float(high[-1]), float(low[-1]),
+                float(close[-1]), float(_volume[-1])
+            )
+
+        # Lifecycle: end (the kernel already closed any open position at the last close)
+        strategy.on_end()
+
+        analyzer = Analyzer(portfolio)
+        analyzer.symbol = symbol
+        analyzer.strategy_name = strategy.name
+        analyzer.bar_count = bar_count
+
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Vectorized backtest complete | Final equity: $%s | Total return: %.2f%% | Bars: %s",
+                f"{analyzer.total_equity:,.0f}", analyzer.total_return_pct, f"{bar_count:,}"
+            )
 
         return analyzer
 
@@ -111,44 +207,90 @@ class Engine:
         strategy_params: Optional[Dict[str, Any]] = None,
         initial_cash: float = 100_000.0,
         min_trade_size: float = 0.1,
-        show_progress: bool = True
+        show_progress: bool = True,
+        max_workers: Optional[int] = None
     ) -> Dict[str, Analyzer]:
         """
         Run same strategy on multiple symbols → return dict of results
         Perfect for ranking and comparison
+        Symbols are independent → each one runs in its own worker process
+        (max_workers=None → one per CPU core); results keep the order of `symbols`
+        A single symbol or a single worker runs in-process (no pool start-up, no pickling)
+        Workers send back only (metrics, equity arrays) → each result is Analyzer.from_metrics():
+        every metric, equity_curve, summary_table() work, but portfolio is None (no trade log);
+        run Engine(...).run() on a symbol for the full Portfolio
         """
         from tqdm import tqdm
 
-        results = {}
-        iterator = tqdm(symbols, desc=f"Running {strategy_class.__name__}", leave=True) if show_progress else symbols
+        job_args = (strategy_class, start_datetime, end_datetime, strategy_params, initial_cash, min_trade_size)
+        workers = min(max_workers or os.cpu_count() or 1, len(symbols))
+        desc = f"Running {strategy_class.__name__}"
 
-        for symbol in iterator:
-            try:
-                from datafeed.db_feed import SQLiteFeed
-                feed = SQLiteFeed(
-                    symbol=symbol,
-                    start_datetime=start_datetime,
-                    end_datetime=end_datetime
-                )
-
-                engine = cls(
-                    feed=feed,
-                    strategy_class=strategy_class,
-                    strategy_params=strategy_params,
-                    initial_cash=initial_cash,
-                    min_trade_size=min_trade_size
-                )
-                result = engine.run()
-                results[symbol] = result
-
-                if show_progress and isinstance(iterator, tqdm):
-                    iterator.set_postfix({
-                        "last": symbol,
-                        "return": f"{result.metrics['total_return_pct']:+.1f}%"
-                    })
+        results: Dict[str, Analyzer] = {}
 
+        def collect(symbol: str, outcome, progress) -> None:
+            """Store one finished backtest (outcome: zero-arg callable returning _run_one()'s payload)"""
+            try:
+                result = Analyzer.from_metrics(*outcome())
             except Exception as e:
-                logging.error(f"Failed on {symbol}: {e}")
-                continue
+                logger.error("Failed on %s: %s", symbol, e)
+                return
+
+            results[symbol] = result
+
+            if progress is not None:
+                progress.set_postfix({
+                    "last": symbol,
+                    "return": f"{result.total_return_pct:+.1f}%"
+                })
+
+        if workers <= 1:
+            iterator = tqdm(symbols, desc=desc, leave=True) if show_progress else symbols
+            for symbol in iterator:
+                collect(symbol, lambda: _run_one(symbol, *job_args), iterator if show_progress else None)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {executor.submit(_run_one, symbol, *job_args): symbol for symbol in symbols}
+
+                iterator = as_completed(futures)
+                if show_progress:
+                    iterator = tqdm(iterator, total=len(futures), desc=desc, leave=True)
+
+                for future in iterator:
+                    collect(futures[future], future.result, iterator if show_progress else None)
+
+        return {symbol: results[symbol] for symbol in symbols if symbol in results}
+
+
+def _run_one(
+    symbol: str,
+    strategy_class: Type[Strategy],
+    start_datetime: int,
+    end_datetime: int,
+    strategy_params: Optional[Dict[str, Any]],
+    initial_cash: float,
+    min_trade_size: float
+) -> Tuple[Dict[str, Any], np.ndarray, np.ndarray]:
+    """
+    Worker for Engine.run_multiple() — module-level so it can be pickled
+    Loads the symbol once into NumPy columns in the worker process (own connection, safe under WAL)
+    → (metrics, datetimes, equity): only the recorded equity points travel back to the parent,
+    not the Analyzer with its Portfolio buffers and trade log
+    """
+    from datafeed.db_feed import SQLiteArrayFeed
+    feed = SQLiteArrayFeed(
+        symbol=symbol,
+        start_datetime=start_datetime,
+        end_datetime=end_datetime
+    )
 
-        return results
\ No newline at end of file
+    engine = Engine(
+        feed=feed,
+        strategy_class=strategy_class,
+        strategy_params=strategy_params,
+        initial_cash=initial_cash,
+        min_trade_size=min_trade_size
+    )
+    analyzer = engine.run()
+    datetimes, equity = analyzer.portfolio.equity_arrays
+    return analyzer.metrics, datetimes, equity
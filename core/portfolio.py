@@ -1,10 +1,37 @@
 # core/portfolio.py
-from typing import List, Dict, Any
+from typing import Optional, Tuple
 from datetime import datetime
+import numpy as np
 import pandas as pd
 
 from database.schema import Bar
 
+# Trade log layout — one row per fill, contiguous columns ready for NumPy/Numba
+TRADE_BUY = 0
+TRADE_SELL = 1
+TRADE_DTYPE = np.dtype([
+    ("datetime", "<i8"),   # Unix ms of the bar the trade was placed on (-1 = unknown)
+    ("side", "u1"),        # TRADE_BUY / TRADE_SELL
+    ("size", "<f8"),
+    ("price", "<f8"),
+])
+
+
+def equity_frame(datetimes: np.ndarray, equity: np.ndarray) -> pd.DataFrame:
+    """
+    Equity curve DataFrame from Unix-ms datetimes + equity values
+    → datetime (UTC, datetime64[ns] index) → equity; empty input → empty frame
+    """
+    if equity.size == 0:
+        return pd.DataFrame(columns=["datetime", "equity"])
+
+    # int64 ms buffer reinterpreted as datetime64[ms], then widened to ns → same index dtype
+    # (datetime64[ns, UTC]) as before; the equity column still wraps the float buffer zero-copy
+    dt_idx = pd.DatetimeIndex(
+        np.asarray(datetimes, dtype=np.int64).view("datetime64[ms]"), tz="UTC", name="datetime"
+    ).as_unit("ns")
+    return pd.DataFrame({"equity": equity}, index=dt_idx, copy=False)
+
 
 class Portfolio:
     """
@@ -17,7 +44,12 @@ class Portfolio:
     """
 
 
-    def __init__(self, initial_cash: float = 100_000.0, min_trade_size: float = 0.1):
+    def __init__(
+        self,
+        initial_cash: float = 100_000.0,
+        min_trade_size: float = 0.1,
+        expected_bars: Optional[int] = None
+    ):
         self.min_trade_size = float(min_trade_size) # US brokers normally allow 0.1 share split
         self.initial_cash = float(initial_cash)
 
@@ -25,10 +57,16 @@ class Portfolio:
         self.cash: float = initial_cash
         self.position: float = 0.0  # shares/contracts held
         self.entry_price: float = 0.0  # for unrealized P&L (we are only dealing with one asset)
+        self.current_dt: Optional[int] = None  # Unix ms of the bar being processed — set by Engine before next()
 
-        # History for analyzer
-        self._history: List[tuple[int, float]] = []  # (datetime_ms, equity)
-        self._trades: List[Dict[str, Any]] = []  # full trade log
+        # History for analyzer — Struct-of-Arrays (datetime_ms, equity), grown geometrically
+        capacity = max(int(expected_bars or 0), 1024)
+        self._hist_dt = np.empty(capacity, dtype=np.int64)
+        self._hist_eq = np.empty(capacity, dtype=np.float64)
+        self._hist_n: int = 0
+        self._equity_df_cache: Optional[pd.DataFrame] = None  # built lazily by equity_curve
+        self._trades = np.empty(64, dtype=TRADE_DTYPE)  # full trade log, grown geometrically
+        self._n_trades: int = 0
 
     # ------------------------------------------------------------------
     # 1. Order execution
@@ -50,13 +88,7 @@ class Portfolio:
         self.position += actual_size
         self.entry_price = price
 
-        self._trades.append({
-            "datetime": None,
-            "type": "BUY",
-            "size": round(actual_size, 6),
-            "price": price,
-            "cost": cost
-        })
+        self._record_trade(TRADE_BUY, actual_size, price)
 
     def sell(self, size: float, price: float) -> None:
         if size <= 0 or price <= 0 or self.position <= 0:
@@ -74,13 +106,16 @@ class Portfolio:
             self.position = 0.0
             self.entry_price = 0.0
 
-        self._trades.append({
-            "datetime": None,
-            "type": "SELL",
-            "size": round(sellable, 6),
-            "price": price,
-            "proceeds": proceeds
-        })
+        self._record_trade(TRADE_SELL, sellable, price)
+
+    def _record_trade(self, side: int, size: float, price: float) -> None:
+        """Append one fill to the structured trade log (doubles capacity when full)"""
+        n = self._n_trades
+        if n == self._trades.size:
+            self._trades = np.resize(self._trades, n * 2)
+        dt = self.current_dt if self.current_dt is not None else -1
+        self._trades[n] = (dt, side, round(size, 6), price)
+        self._n_trades = n + 1
 
     def sell_all(self, price: float) -> None:
         """Close entire position at current price"""
@@ -104,14 +139,22 @@ class Portfolio:
         current_equity = self.cash + position_value
 
         # Record equity curve point
-        self._history.append((bar.datetime, current_equity))
-
-        # Update last trade datetime (so Analyzer knows when trade happened)
-        if self._trades and self._trades[-1]["datetime"] is None:
-            self._trades[-1]["datetime"] = bar.datetime
+        n = self._hist_n
+        if n == self._hist_dt.size:
+            self._grow_history()
+        self._hist_dt[n] = bar.datetime
+        self._hist_eq[n] = current_equity
+        self._hist_n = n + 1
+        self._equity_df_cache = None
 
         return current_equity
 
+    def _grow_history(self) -> None:
+        """Double history capacity (amortized O(1) appends)"""
+        capacity = max(self._hist_dt.size * 2, 1024)
+        self._hist_dt = np.resize(self._hist_dt, capacity)
+        self._hist_eq = np.resize(self._hist_eq, capacity)
+
     # ------------------------------------------------------------------
     # 3. State queries — used by Strategy
     # ------------------------------------------------------------------
@@ -126,29 +169,82 @@ class Portfolio:
     @property
     def total_equity(self) -> float:
         # Only valid after last update()
-        if not self._history:
+        if self._hist_n == 0:
             return self.initial_cash
-        return self._history[-1][1]
+        return float(self._hist_eq[self._hist_n - 1])
 
     # ------------------------------------------------------------------
     # 4. Results for Analyzer
     # ------------------------------------------------------------------
     @property
-    def trades(self) -> List[Dict[str, Any]]:
-        """Immutable copy of trade log"""
-        return self._trades.copy()
+    def history_len(self) -> int:
+        """Number of equity points recorded (one per update() / vectorized bar)"""
+        return self._hist_n
+
+    @property
+    def trades(self) -> np.ndarray:
+        """Copy of the trade log — structured array of TRADE_DTYPE (datetime, side, size, price)"""
+        return self._trades[:self._n_trades].copy()
 
     @property
     def equity_curve(self) -> pd.DataFrame:
-        """DataFrame: datetime (ms) → equity"""
-        if not self._history:
-            return pd.DataFrame(columns=["datetime", "equity"])
+        """
+        DataFrame: datetime (UTC, datetime64[ns] index) → equity
+        Built once and cached until the next update() — treat it as read-only
+        """
+        if self._equity_df_cache is not None:
+            return self._equity_df_cache
 
-        df = pd.DataFrame(self._history, columns=["datetime", "equity"])
-        df["datetime"] = pd.to_datetime(df["datetime"], unit="ms", utc=True)
-        df = df.set_index("datetime")
+        n = self._hist_n
+        if n == 0:
+            return equity_frame(self._hist_dt[:0], self._hist_eq[:0])
+
+        df = equity_frame(self._hist_dt[:n], self._hist_eq[:n])
+        self._equity_df_cache = df
         return df
 
+    @property
+    def equity_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (Unix-ms datetimes int64, equity float64) views of the recorded history — no copy
+        Pickling them ships only the recorded points, not the preallocated capacity
+        """
+        n = self._hist_n
+        return self._hist_dt[:n], self._hist_eq[:n]
+
+    def load_vectorized(
+        self,
+        datetimes: np.ndarray,
+        equity: np.ndarray,
+        trade_idx: np.ndarray,
+        trade_side: np.ndarray,
+        trade_size: np.ndarray,
+        trade_price: np.ndarray,
+        cash: float,
+        position: float
+    ) -> None:
+        """
+        Bulk-load the output of core._kernels.simulate_signals()
+        Used by Engine.run_vectorized() instead of per-bar buy()/sell()/update()
+        """
+        n = equity.size
+        self._hist_dt = np.ascontiguousarray(datetimes[:n], dtype=np.int64)
+        self._hist_eq = np.ascontiguousarray(equity, dtype=np.float64)
+        self._hist_n = n
+        self._equity_df_cache = None
+
+        k = trade_idx.size
+        self._trades = np.empty(max(k, 64), dtype=TRADE_DTYPE)
+        self._trades["datetime"][:k] = datetimes[trade_idx]
+        self._trades["side"][:k] = trade_side   # kernel uses the same 0 = BUY / 1 = SELL codes
+        self._trades["size"][:k] = np.round(trade_size, 6)
+        self._trades["price"][:k] = trade_price
+        self._n_trades = k
+
+        self.cash = float(cash)
+        self.position = float(position)
+        self.entry_price = float(trade_price[-1]) if position > 0 and k else 0.0
+
     def reset(self) -> None:
         """Reset to initial state — useful for multiple runs"""
         self.__init__(initial_cash=self.initial_cash)
\ No newline at end of file
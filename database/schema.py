@@ -1,6 +1,7 @@
 # database/schema.py
 from collections import namedtuple
 from datetime import datetime
+import numpy as np
 
 # This part referred the design of Backtrader's linebuffer[0]
 
@@ -17,6 +18,17 @@ Bar = namedtuple(
     ],
 )
 
+# Columnar (Struct-of-Arrays) batch of bars for one symbol — symbol is kept on the feed
+# Used by whole-backtest paths (feed.to_batch(), Engine.run_vectorized()) instead of one Bar per row
+BAR_DTYPE = np.dtype([
+    ("datetime", "<i8"),   # Unix milliseconds (UTC)
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<f8"),
+])
+
 # -----------------------------------
 # SQLite table definitions (Query strings)
 # -----------------------------------
@@ -32,10 +44,17 @@ CREATE TABLE IF NOT EXISTS bars (
     volume      REAL    NOT NULL,
 
     PRIMARY KEY (symbol, datetime)
-);
+) WITHOUT ROWID;
+
+-- WITHOUT ROWID → the (symbol, datetime) PRIMARY KEY *is* the table's clustered B-tree,
+-- so range queries read rows straight from it and no secondary index is needed
+"""
 
--- Index for super-fast range queries (this is the magic for speed)
-CREATE INDEX IF NOT EXISTS idx_symbol_time ON bars(symbol, datetime);
+# Only for databases built before the WITHOUT ROWID layout (plain rowid table):
+# covering index → feed queries become "SEARCH ... USING COVERING INDEX", no table lookups / sort
+SQLITE_CREATE_COVERING_INDEX = """
+CREATE INDEX IF NOT EXISTS idx_bars_symbol_dt
+    ON bars (symbol, datetime, open, high, low, close, volume);
 """
 
 # -----------------------------------
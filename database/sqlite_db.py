@@ -2,13 +2,30 @@
 import sqlite3
 from pathlib import Path
 from typing import Generator, Tuple
+import importlib.util
+import itertools
+import numpy as np
 import pandas as pd
 import time
 from tqdm import tqdm
 import logging
 
 from config import RAW_DATA_ROOT, SQLITE_DB_PATH
-from .schema import SQLITE_CREATE_TABLE, Bar
+from .schema import SQLITE_CREATE_TABLE, SQLITE_CREATE_COVERING_INDEX, Bar
+
+INSERT_BATCH_SIZE = 50_000  # rows per executemany() call
+
+INSERT_SQL = """
+    INSERT INTO bars (symbol, datetime, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+INSERT_OR_IGNORE_SQL = """
+    INSERT OR IGNORE INTO bars (symbol, datetime, open, high, low, close, volume)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# pyarrow is optional — fall back to pandas' own C parser without it
+CSV_ENGINE = "pyarrow" if importlib.util.find_spec("pyarrow") is not None else "c"
 
 # ----------------------------------------------------------------------
 # Your exact TECH_100 universe — only these symbols will be loaded
@@ -58,27 +75,44 @@ class SQLiteDatabase:
         cur = self.conn.cursor()
 
         # --- Performance PRAGMAs (battle-tested for 100M+ row loads) ---
+        cur.execute("PRAGMA page_size = 32768;")           # Must precede WAL / first table (fresh DB only)
         cur.execute("PRAGMA journal_mode = WAL;")          # Allow concurrent reads
         cur.execute("PRAGMA synchronous = NORMAL;")       # Safe + fast
         cur.execute("PRAGMA cache_size = -64000;")         # 64 MB cache (negative = KB)
         cur.execute("PRAGMA temp_store = MEMORY;")        # Temp tables in RAM
         cur.execute("PRAGMA foreign_keys = OFF;")          # Not needed here
+        cur.execute("PRAGMA mmap_size = 30000000000;")     # Memory-map the file (~30 GB cap)
 
         return self.conn
 
     def create_table_and_index(self) -> None:
-        """Create table + critical composite index exactly once"""
+        """Create the clustered (WITHOUT ROWID) table exactly once — its PK doubles as the index"""
         if self.conn is None:
             self.connect()
 
         self.conn.executescript(SQLITE_CREATE_TABLE)
-        logging.info("Table 'bars' and index created/verified")
+        logging.info("Table 'bars' created/verified")
+
+        # Legacy rowid table (pre-WITHOUT ROWID database) → migrate with a covering index instead
+        try:
+            self.conn.execute("SELECT rowid FROM bars LIMIT 0")
+        except sqlite3.OperationalError:
+            return  # WITHOUT ROWID: the clustered PK already covers every feed query
+        self.conn.executescript(SQLITE_CREATE_COVERING_INDEX)
+        logging.info("Legacy rowid table → covering index 'idx_bars_symbol_dt' created/verified")
 
-    def load_all_raw_data(self, show_progress: bool = True) -> None:
+    def load_all_raw_data(self, show_progress: bool = True, fresh: bool = False) -> None:
+        """
+        fresh=True → initial build into an empty table: skips the per-row uniqueness
+        check of INSERT OR IGNORE (a duplicate row aborts and rolls back the whole load)
+        """
         start_time = time.time()
         self.connect()
         self.create_table_and_index()
 
+        if fresh and self.conn.execute("SELECT 1 FROM bars LIMIT 1").fetchone() is not None:
+            raise ValueError("fresh=True requires an empty 'bars' table")
+
         # Find every CSV in your E:\stock\...\*.csv structure
         csv_files = list(RAW_DATA_ROOT.rglob("*.csv"))
         if not csv_files:
@@ -87,22 +121,36 @@ class SQLiteDatabase:
         total_inserted = 0
         pbar = tqdm(csv_files, desc="Loading TECH_100 → SQLite", unit="file", disable=not show_progress)
 
-        for csv_path in pbar:
-            symbol = csv_path.stem.upper()   # filename without .csv → e.g. "AAPL"
-            if symbol not in TECH_100:
-                continue  # Skip non-tech stocks → keeps DB small & submittable
+        # Loader is the only writer → hold the file lock for the whole load (no lock churn)
+        self.conn.execute("PRAGMA locking_mode = EXCLUSIVE;")
 
-            inserted = self._load_single_csv(csv_path, symbol)
-            total_inserted += inserted
-
-            pbar.set_postfix({
-                "symbol": symbol,
-                "inserted": f"{total_inserted:,}",
-                "file": csv_path.name
-            })
+        # One transaction for the whole load instead of one per statement
+        self.conn.execute("BEGIN")
+        try:
+            for csv_path in pbar:
+                symbol = csv_path.stem.upper()   # filename without .csv → e.g. "AAPL"
+                if symbol not in TECH_100:
+                    continue  # Skip non-tech stocks → keeps DB small & submittable
+
+                inserted = self._load_single_csv(csv_path, symbol, fresh=fresh)
+                total_inserted += inserted
+
+                pbar.set_postfix({
+                    "symbol": symbol,
+                    "inserted": f"{total_inserted:,}",
+                    "file": csv_path.name
+                })
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
 
         self.vacuum_and_optimize()
 
+        # WAL + EXCLUSIVE lock is only released by closing → reopen in normal mode for readers
+        self.close()
+        self.connect()
+
         duration = time.time() - start_time
         print("\nSQLite Database Successfully Created!")
         print(f"   Symbols loaded   : {len(TECH_100)} (TECH_100 only)")
@@ -111,19 +159,22 @@ class SQLiteDatabase:
         print(f"   DB size          : {self.db_path.stat().st_size / 1024**3:.2f} GB")
         print(f"   Path             : {self.db_path}")
 
-    def _load_single_csv(self, csv_path: Path, symbol: str) -> int:
+    def _load_single_csv(self, csv_path: Path, symbol: str, fresh: bool = False) -> int:
         """
         Load one symbol's daily CSV using pandas → convert → bulk insert
         Uses 'eob' column → end-of-bar timestamp (broker standard)
+        fresh=True → plain INSERT (caller guarantees the rows are not in the DB yet)
         """
         try:
             # Read only needed columns + parse eob directly
+            # (pyarrow engine parses dates in vectorized C++ when available)
             df = pd.read_csv(
                 csv_path,
                 usecols=["eob", "open", "high", "low", "close", "volume"],
                 dtype={"open": "float64", "high": "float64", "low": "float64",
                        "close": "float64", "volume": "float64"},
-                parse_dates=["eob"]
+                parse_dates=["eob"],
+                engine=CSV_ENGINE
             )
         except Exception as e:
             logging.warning(f"Failed to read {csv_path}: {e}")
@@ -133,24 +184,37 @@ class SQLiteDatabase:
             return 0
 
         # Convert eob → Unix milliseconds (UTC, end-of-bar)
-        df["datetime"] = df["eob"].astype('int64') // 1_000_000  # ns → ms
+        # as_unit() makes this independent of the parser's resolution (ns / us / s)
+        df["datetime"] = df["eob"].dt.as_unit("ms").astype("int64")
         df = df.drop(columns=["eob"])
 
-        # Build list of tuples: (symbol, datetime_ms, o, h, l, c, v)
-        records = [
-            (symbol, int(row["datetime"]), row["open"], row["high"], row["low"], row["close"], row["volume"])
-            for _, row in df.iterrows()
-        ]
-
-        # Bulk insert with duplicate protection
+        # Insert in PK order → sequential appends into the clustered B-tree (no page splits)
+        if not df["datetime"].is_monotonic_increasing:
+            df = df.sort_values("datetime", kind="stable")
+
+        # Build tuples column-wise: (symbol, datetime_ms, o, h, l, c, v)
+        # .tolist() converts each NumPy column to Python scalars in C — no per-row Series boxing
+        records = zip(
+            itertools.repeat(symbol),
+            df["datetime"].to_numpy(dtype=np.int64).tolist(),
+            df["open"].to_numpy().tolist(),
+            df["high"].to_numpy().tolist(),
+            df["low"].to_numpy().tolist(),
+            df["close"].to_numpy().tolist(),
+            df["volume"].to_numpy().tolist(),
+        )
+
+        # Bulk insert in fixed-size batches
+        # fresh load → plain INSERT (no duplicates possible); otherwise duplicate protection
+        sql = INSERT_SQL if fresh else INSERT_OR_IGNORE_SQL
         cur = self.conn.cursor()
-        cur.executemany("""
-            INSERT OR IGNORE INTO bars (symbol, datetime, open, high, low, close, volume)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, records)
-        self.conn.commit()
+        while True:
+            batch = list(itertools.islice(records, INSERT_BATCH_SIZE))
+            if not batch:
+                break
+            cur.executemany(sql, batch)
 
-        return len(records)
+        return len(df)
 
     def vacuum_and_optimize(self) -> None:
         """Final cleanup & optimization — makes queries lightning fast"""
@@ -190,9 +254,13 @@ class SQLiteDatabase:
         self.connect()
         return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
+    def close(self) -> None:
         if self.conn:
             self.conn.close()
+            self.conn = None
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
 
 # ----------------------------------------------------------------------
@@ -201,4 +269,4 @@ class SQLiteDatabase:
 if __name__ == "__main__":
     logging.basicConfig(level=logging.INFO)
     db = SQLiteDatabase()
-    db.load_all_raw_data(show_progress=True)
\ No newline at end of file
+    db.load_all_raw_data(show_progress=True, fresh=not db.db_path.exists())
\ No newline at end of file
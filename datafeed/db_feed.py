@@ -1,11 +1,91 @@
 # datafeed/db_feed.py
+import itertools
+import logging
 import sqlite3
-from typing import Iterator, Optional
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
 from pathlib import Path
+import numpy as np
 
-from database.schema import Bar
+from database.schema import Bar, BAR_DTYPE, SQLITE_CREATE_COVERING_INDEX
 from config import SQLITE_DB_PATH
 
+logger = logging.getLogger(__name__)
+
+FETCH_BATCH_SIZE = 1000  # rows pulled per fetchmany() in SQLiteFeed.__next__
+LOAD_BATCH_SIZE = 10_000  # rows pulled per fetchmany() when draining into columns (to_batch)
+
+# Process-wide read connections keyed by (resolved db path, immutable) — see shared_connection
+_CONNS: Dict[Tuple[Path, bool], sqlite3.Connection] = {}
+
+# One fixed streaming query for every feed: open bounds are bound as sentinels, so the
+# SQL text (→ sqlite3's per-connection statement cache entry and SQLite's plan) never varies
+BARS_QUERY = """
+    SELECT symbol, datetime, open, high, low, close, volume
+    FROM bars
+    WHERE symbol = ? AND datetime >= ? AND datetime <= ?
+    ORDER BY datetime ASC
+"""
+MIN_DATETIME = -(2 ** 62)  # sentinel for start_datetime=None (Unix ms; inside SQLite's signed 64-bit INTEGER)
+MAX_DATETIME = 2 ** 62     # sentinel for end_datetime=None
+
+
+def open_read_connection(db_path: Path = SQLITE_DB_PATH, immutable: bool = True) -> sqlite3.Connection:
+    """
+    Open a reader connection tuned for sequential scans of historical bars
+    URI flags: mode=ro (never writes); no cache=shared — feeds already reuse one connection per
+    process (shared_connection), and a shared pager would tie connections of different modes together
+    immutable=True adds immutable=1 → SQLite skips all locking and WAL/change checks and serves
+    pages straight from the mmap. No writer (e.g. SQLiteDatabase.load_all_raw_data) may touch
+    the file while such a connection is open — it never sees later commits
+    immutable=False → normal locking reader that sees each new commit (WAL included), even when
+    an immutable connection to the same file is open in this process (connections share no cache)
+    """
+    uri = f"{Path(db_path).resolve().as_uri()}?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    # No row_factory → rows stay plain tuples (positional access, no per-column name lookup)
+    cur = conn.cursor()
+
+    # --- Read-side PRAGMAs (historical bars are only ever scanned here) ---
+    # journal_mode is not set: WAL is persistent in the file (set by the loader), and
+    # switching it from a reader would need a write lock
+    cur.execute("PRAGMA cache_size = -262144;")       # 256 MB page cache (negative = KB)
+    cur.execute("PRAGMA mmap_size = 1073741824;")     # Serve pages from the OS page cache (1 GB cap)
+    cur.execute("PRAGMA temp_store = MEMORY;")        # ORDER BY spill / temp b-trees in RAM
+    cur.execute("PRAGMA synchronous = OFF;")          # Reader never commits anything
+    cur.execute("PRAGMA query_only = 1;")             # Last: reject any write on this connection
+    cur.close()
+    return conn
+
+
+def shared_connection(db_path: Path = SQLITE_DB_PATH, immutable: bool = True) -> sqlite3.Connection:
+    """
+    One read connection per process and (database file, immutable) pair, opened on first use
+    Pass it to many feeds (conn=...) → no reconnect / re-prepare per symbol
+    A different db_path or immutable flag gets its own connection, never a mismatched one
+    The immutable=True connection keeps serving the file as first opened — after reloading the
+    database use immutable=False (or a fresh process) to see the new data
+    """
+    key = (Path(db_path).resolve(), immutable)
+    conn = _CONNS.get(key)
+    if conn is None:
+        conn = _CONNS[key] = open_read_connection(db_path, immutable)
+    return conn
+
+
+class _BarView:
+    """
+    Mutable stand-in for Bar, overwritten in place by a feed with reuse_bar=True
+    Same attribute names as Bar — valid only until the next bar is fetched
+    """
+    __slots__ = ("symbol", "datetime", "open", "high", "low", "close", "volume")
+
+    def __repr__(self) -> str:
+        return (f"_BarView(symbol={self.symbol!r}, datetime={self.datetime}, open={self.open}, "
+                f"high={self.high}, low={self.low}, close={self.close}, volume={self.volume})")
+
 
 class BaseFeed:
     """
@@ -17,13 +97,36 @@ class BaseFeed:
     def __next__(self) -> Bar:
         raise NotImplementedError
 
+    def to_batch(self) -> np.ndarray:
+        """
+        Drain the feed into one structured array of BAR_DTYPE (columnar batch)
+        Generic fallback via the iterator protocol; feeds may override with a faster path
+        """
+        return np.fromiter(
+            ((b.datetime, b.open, b.high, b.low, b.close, b.volume) for b in self),
+            dtype=BAR_DTYPE
+        )
+
+    def to_arrays(self) -> Tuple[np.ndarray, ...]:
+        """
+        Drain the feed into contiguous column arrays for Engine.run_vectorized()
+        → (datetime int64, open, high, low, close, volume float64)
+        """
+        batch = self.to_batch()
+        return tuple(np.ascontiguousarray(batch[name]) for name in BAR_DTYPE.names)
+
 
 class SQLiteFeed(BaseFeed):
     """
     High-performance bar-by-bar iterator from SQLite
     → Never loads full history into memory
-    → Uses composite index → blazing fast even on 100M+ rows
+    → Reads the clustered (symbol, datetime) primary key → blazing fast even on 100M+ rows
     → Perfect for backtesting + real-time simulation
+    → conn=shared_connection() reuses one connection across feeds (never closed by the feed)
+    → immutable=True (default) opens the file with immutable=1 — no writer may touch it meanwhile
+    → reuse_bar=True yields one mutable _BarView overwritten every bar (no allocation per bar);
+      consumers must not keep references across iterations (Strategy copies the fields it
+      needs into its ring buffers, so strategies built on sma()/atr() are fine)
     """
 
     def __init__(
@@ -31,45 +134,61 @@ class SQLiteFeed(BaseFeed):
         symbol: str,
         start_datetime: Optional[int] = None,   # Unix ms
         end_datetime: Optional[int] = None,     # Unix ms (inclusive)
-        db_path: Path = SQLITE_DB_PATH
+        db_path: Path = SQLITE_DB_PATH,
+        conn: Optional[sqlite3.Connection] = None,
+        reuse_bar: bool = False,
+        immutable: bool = True
     ):
         self.symbol = symbol.upper()
         self.start_datetime = start_datetime
         self.end_datetime = end_datetime
         self.db_path = Path(db_path)
+        self.immutable = immutable  # only used when the feed opens its own connection
+
+        self._bar: Optional[_BarView] = None
+        if reuse_bar:
+            self._bar = _BarView()
+            self._bar.symbol = self.symbol
 
-        self.conn: Optional[sqlite3.Connection] = None
+        self.conn: Optional[sqlite3.Connection] = conn
+        self._owns_conn = conn is None
         self.cursor: Optional[sqlite3.Cursor] = None
+        self._buffer: list = []  # fetched rows, reversed → pop() yields them in order
         self._setup_connection_and_query()
 
     def _setup_connection_and_query(self) -> None:
         """Open connection and prepare the streaming query"""
-        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
-        self.conn.row_factory = sqlite3.Row   # allows dict-like access
-
-        # Build WHERE clause
-        where_conditions = ["symbol = ?"]
-        params = [self.symbol]
-
-        if self.start_datetime is not None:
-            where_conditions.append("datetime >= ?")
-            params.append(self.start_datetime)
+        if self.conn is None:
+            self.conn = open_read_connection(self.db_path, self.immutable)
 
-        if self.end_datetime is not None:
-            where_conditions.append("datetime <= ?")
-            params.append(self.end_datetime)
-
-        where_clause = " AND ".join(where_conditions)
+        self._query = BARS_QUERY
+        self._params = (
+            self.symbol,
+            MIN_DATETIME if self.start_datetime is None else self.start_datetime,
+            MAX_DATETIME if self.end_datetime is None else self.end_datetime
+        )
+        self.cursor = self.conn.cursor()
+        # Plain tuples even on a caller's connection that installed a row_factory (e.g. sqlite3.Row)
+        self.cursor.row_factory = None
+        self.cursor.execute(self._query, self._params)
 
-        query = f"""
-            SELECT symbol, datetime, open, high, low, close, volume
-            FROM bars
-            WHERE {where_clause}
-            ORDER BY datetime ASC
+    def __iter__(self) -> Iterator[Bar]:
         """
-
-        self.cursor = self.conn.cursor()
-        self.cursor.execute(query, params)
+        Fast path: map(Bar._make, cursor) — the cursor's C iterator and C-level map produce
+        Bars with no Python __next__ frame per bar (rows already buffered by __next__ come first)
+        Once the rows run out the feed closes itself, as __next__ does on StopIteration
+        reuse_bar=True keeps the __next__ protocol (the shared view is mutated there)
+        """
+        if self._bar is not None:
+            return self
+        if self.cursor is None:
+            return iter(())  # closed / exhausted (close() also clears the buffer)
+        rows = self.cursor
+        if self._buffer:
+            rows = itertools.chain(self._buffer[::-1], rows)
+            self._buffer = []
+        # iter(self.close, None): calls close() once after the last row → ends (close returns None)
+        return itertools.chain(map(Bar._make, rows), iter(self.close, None))
 
     def __next__(self) -> Bar:
         """
@@ -77,31 +196,64 @@ class SQLiteFeed(BaseFeed):
             for bar in feed:
                 strategy.next(bar)
         """
-        if self.cursor is None:
-            raise StopIteration
+        buffer = self._buffer
+        if not buffer:
+            if self.cursor is None:
+                raise StopIteration
+            buffer = self.cursor.fetchmany(FETCH_BATCH_SIZE)
+            if not buffer:
+                self.close()
+                raise StopIteration
+            buffer.reverse()
+            self._buffer = buffer
 
-        row = self.cursor.fetchone()
-        if row is None:
-            self.close()
-            raise StopIteration
+        row = buffer.pop()
+        bar = self._bar
+        if bar is not None:
+            # Overwrite the shared view in place (symbol never changes)
+            _, bar.datetime, bar.open, bar.high, bar.low, bar.close, bar.volume = row
+            return bar
+        # SELECT column order matches the Bar namedtuple → build it straight from the tuple
+        return Bar._make(row)
 
-        # Convert SQLite Row → our immutable Bar namedtuple
-        return Bar(
-            symbol=row["symbol"],
-            datetime=row["datetime"],
-            open=row["open"],
-            high=row["high"],
-            low=row["low"],
-            close=row["close"],
-            volume=row["volume"]
+    def to_batch(self) -> np.ndarray:
+        """
+        Drain all remaining rows into columns (no per-bar Bar objects), then close
+        Rows arrive in fetchmany() chunks appended to typed array.array buffers → the full
+        list of row tuples a fetchall() would build never exists
+        """
+        dt_arr, o_arr, h_arr, l_arr, c_arr, v_arr = (
+            array("q"), array("d"), array("d"), array("d"), array("d"), array("d")
         )
+        rows = self._buffer[::-1]  # rows already fetched by __next__ come first
+        while True:
+            # row = (symbol, datetime, open, high, low, close, volume) → symbol is dropped
+            for _, dt, o, h, l, c, v in rows:
+                dt_arr.append(dt)
+                o_arr.append(o)
+                h_arr.append(h)
+                l_arr.append(l)
+                c_arr.append(c)
+                v_arr.append(v)
+            if self.cursor is None:
+                break
+            rows = self.cursor.fetchmany(LOAD_BATCH_SIZE)
+            if not rows:
+                break
+        self.close()
+
+        batch = np.empty(len(dt_arr), dtype=BAR_DTYPE)
+        for name, buf in zip(BAR_DTYPE.names, (dt_arr, o_arr, h_arr, l_arr, c_arr, v_arr)):
+            batch[name] = np.frombuffer(buf, dtype=batch.dtype[name])  # zero-copy view → one copy in
+        return batch
 
     def close(self) -> None:
         """Clean up DB connection"""
+        self._buffer = []
         if self.cursor:
             self.cursor.close()
             self.cursor = None
-        if self.conn:
+        if self.conn and self._owns_conn:
             self.conn.close()
             self.conn = None
 
@@ -117,16 +269,92 @@ class SQLiteFeed(BaseFeed):
         self.close()
         self._setup_connection_and_query()
 
+    def explain_query_plan(self) -> List[str]:
+        """
+        Plan of the streaming query — expect a single SEARCH on the primary key
+        (or "USING COVERING INDEX idx_bars_symbol_dt" on legacy rowid tables) and no TEMP B-TREE
+        A full-table SCAN (no usable (symbol, datetime) index) is logged as a warning with the fix
+        """
+        cur = self.conn.cursor()
+        cur.execute("EXPLAIN QUERY PLAN " + self._query, self._params)
+        plan = [row[-1] for row in cur.fetchall()]
+        cur.close()
+        if any(step.startswith("SCAN") for step in plan):
+            logger.warning(
+                "Bars query for %s scans the whole table (%s) → every feed costs O(rows); create the index:%s",
+                self.symbol, "; ".join(plan), SQLITE_CREATE_COVERING_INDEX.rstrip()
+            )
+        return plan
+
     def get_first_datetime(self) -> Optional[int]:
         """Quick peek at first available bar time"""
         cur = self.conn.cursor()
-        cur.execute("SELECT MIN(datetime) FROM bars WHERE symbol = ?", (self.symbol,))
+        # ORDER BY + LIMIT 1 → one seek to the first (symbol, datetime) key, no aggregate
+        cur.execute("SELECT datetime FROM bars WHERE symbol = ? ORDER BY datetime ASC LIMIT 1", (self.symbol,))
         row = cur.fetchone()
         return row[0] if row else None
 
     def get_last_datetime(self) -> Optional[int]:
         """Quick peek at last available bar time"""
         cur = self.conn.cursor()
-        cur.execute("SELECT MAX(datetime) FROM bars WHERE symbol = ?", (self.symbol,))
+        # Same seek from the other end of the key range
+        cur.execute("SELECT datetime FROM bars WHERE symbol = ? ORDER BY datetime DESC LIMIT 1", (self.symbol,))
         row = cur.fetchone()
-        return row[0] if row else None
\ No newline at end of file
+        return row[0] if row else None
+
+class InMemoryFeed(BaseFeed):
+    """
+    Replays an already-loaded BAR_DTYPE batch bar by bar
+    → Load a symbol once, then rewind() and run any number of strategies on it
+    → to_batch() / to_arrays() hand the loaded columns straight to Engine.run_vectorized()
+    """
+
+    def __init__(self, batch: np.ndarray, symbol: str):
+        self.symbol = symbol.upper()
+        self._batch: np.ndarray = batch
+        # Plain Python lists for the per-bar path → Bars carry int/float, not NumPy scalars
+        self._columns = tuple(batch[name].tolist() for name in BAR_DTYPE.names)
+        self._i = 0
+
+    def __len__(self) -> int:
+        return len(self._batch)
+
+    def __next__(self) -> Bar:
+        i = self._i
+        if i >= len(self._batch):
+            raise StopIteration
+        self._i = i + 1
+        dt, o, h, l, c, v = self._columns
+        return Bar(self.symbol, dt[i], o[i], h[i], l[i], c[i], v[i])
+
+    def to_batch(self) -> np.ndarray:
+        """Remaining bars as a BAR_DTYPE structured array (no copy of the loaded columns)"""
+        batch = self._batch[self._i:]
+        self._i = len(self._batch)
+        return batch
+
+    def rewind(self) -> None:
+        """Replay from the first bar — no database round trip"""
+        self._i = 0
+
+
+class SQLiteArrayFeed(InMemoryFeed):
+    """
+    Whole symbol loaded once from SQLite into NumPy columns (SoA), then replayed bar by bar
+    → One query + one fetch instead of a live cursor per bar
+    → rewind() is free: re-running strategies on the same symbol never touches SQLite again
+    """
+
+    def __init__(
+        self,
+        symbol: str,
+        start_datetime: Optional[int] = None,   # Unix ms
+        end_datetime: Optional[int] = None,     # Unix ms (inclusive)
+        db_path: Path = SQLITE_DB_PATH,
+        conn: Optional[sqlite3.Connection] = None,
+        immutable: bool = True
+    ):
+        self.start_datetime = start_datetime
+        self.end_datetime = end_datetime
+        feed = SQLiteFeed(symbol, start_datetime, end_datetime, db_path, conn, immutable=immutable)
+        super().__init__(feed.to_batch(), symbol)
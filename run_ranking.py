@@ -5,8 +5,10 @@ Runs multiple strategies across multiple symbols and exports results to CSV
 
 import logging
 import csv
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
-from typing import List, Type, Dict, Any
+from typing import List, Type, Dict, Any, Optional, Tuple
 from pathlib import Path
 
 from core.engine import Engine
@@ -16,6 +18,7 @@ from strategies.sma_atr_exit import SMA_ATR_Exit
 from strategies.SMA_OS_dynamic import SMA_OS_Dynamic
 from strategies.SMA_OS_Fixed import SMA_OS_Fixed
 from database.sqlite_db import TECH_100
+from datafeed.db_feed import InMemoryFeed, SQLiteFeed, shared_connection
 from tqdm import tqdm
 
 # Configure logging
@@ -47,6 +50,12 @@ STRATEGIES: List[Type[Strategy]] = [
 # Symbols to test
 SYMBOLS = list(TECH_100)
 
+# Flush the CSV every N rows (crash safety without one flush per row)
+CSV_FLUSH_EVERY = 50
+
+# Worker processes for the strategy × symbol grid (None → one per CPU core)
+MAX_WORKERS = None
+
 # Output directory
 OUTPUT_DIR = Path("results")
 OUTPUT_DIR.mkdir(exist_ok=True)
@@ -69,6 +78,45 @@ def generate_output_filename(start_ms: int, end_ms: int) -> str:
     return f"ranking_{start_str}_{end_str}.csv"
 
 
+# ============================================================================
+# WORKER
+# ============================================================================
+
+def run_symbol(symbol: str) -> List[Tuple[str, Optional[Dict[str, Any]], Optional[str]]]:
+    """
+    All strategies on one symbol — runs inside a worker process
+    Bars are loaded from SQLite once (worker's own read connection, reused across symbols)
+    and replayed from memory for every strategy
+    Returns (strategy_name, metrics, error) per strategy; only metrics dicts are pickled back
+    """
+    feed = InMemoryFeed(
+        SQLiteFeed(
+            symbol=symbol,
+            start_datetime=START_DATETIME,
+            end_datetime=END_DATETIME,
+            conn=shared_connection()
+        ).to_batch(),
+        symbol
+    )
+
+    results = []
+    for strategy_class in STRATEGIES:
+        feed.rewind()
+        try:
+            engine = Engine(
+                feed=feed,
+                strategy_class=strategy_class,
+                strategy_params=None,  # Use default parameters
+                initial_cash=INITIAL_CASH,
+                min_trade_size=MIN_TRADE_SIZE
+            )
+            analyzer = engine.run()
+            results.append((strategy_class.__name__, analyzer.metrics, None))
+        except Exception as e:
+            results.append((strategy_class.__name__, None, str(e)))
+    return results
+
+
 # ============================================================================
 # MAIN RANKING FUNCTION
 # ============================================================================
@@ -76,6 +124,8 @@ def generate_output_filename(start_ms: int, end_ms: int) -> str:
 def run_ranking():
     """
     Main function to run all strategy-symbol combinations and export results
+    Symbols are independent → spread over a process pool (all strategies per symbol);
+    the CSV is written only from the main process as results complete
     """
     # Calculate total combinations
     total_combinations = len(STRATEGIES) * len(SYMBOLS)
@@ -100,77 +150,55 @@ def run_ranking():
     with open(output_file, 'w', newline='') as csvfile:
         writer = csv.DictWriter(csvfile, fieldnames=csv_headers)
         writer.writeheader()
-
-        # Progress bar for overall completion
-        with tqdm(total=total_combinations, desc="Overall Progress", position=0) as pbar:
-
-            # Iterate through all strategies
-            for strategy_class in STRATEGIES:
-                strategy_name = strategy_class.__name__
-                logging.info(f"\n{'=' * 60}")
-                logging.info(f"Testing Strategy: {strategy_name}")
-                logging.info(f"{'=' * 60}")
-
-                # Iterate through all symbols
-                for symbol in SYMBOLS:
-                    try:
-                        # Import feed here to avoid circular imports
-                        from datafeed.db_feed import SQLiteFeed
-
-                        # Create feed for this symbol
-                        feed = SQLiteFeed(
-                            symbol=symbol,
-                            start_datetime=START_DATETIME,
-                            end_datetime=END_DATETIME
-                        )
-
-                        # Create engine
-                        engine = Engine(
-                            feed=feed,
-                            strategy_class=strategy_class,
-                            strategy_params=None,  # Use default parameters
-                            initial_cash=INITIAL_CASH,
-                            min_trade_size=MIN_TRADE_SIZE
-                        )
-
-                        # Run backtest
-                        analyzer = engine.run()
-
-                        # Extract metrics
-                        metrics = analyzer.metrics
-
-                        # Prepare row for CSV
-                        row = {
-                            "Strategy_Name": strategy_name,
-                            "Symbol": symbol,
-                            "Total_Return": metrics["total_return_pct"],
-                            "Sharpe": metrics["sharpe"],
-                            "Max_Drawdown": metrics["max_drawdown_pct"],
-                            "Volatility": metrics["volatility_annualized"],
-                            "Win_Rate": metrics["win_rate_pct"],
-                            "Total_Trades": metrics["num_trades"]
-                        }
-
-                        # Write to CSV
-                        writer.writerow(row)
-                        csvfile.flush()  # Ensure data is written immediately
-
-                        # Log success
-                        logging.info(
-                            f"✓ {strategy_name} | {symbol} | "
-                            f"Return: {metrics['total_return_pct']:+.2f}% | "
-                            f"Sharpe: {metrics['sharpe']:.2f} | "
-                            f"Trades: {metrics['num_trades']}"
-                        )
-
-                    except Exception as e:
+        rows_written = 0
+
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS or os.cpu_count()) as executor, \
+                tqdm(total=total_combinations, desc="Overall Progress") as pbar:
+            # One job per symbol → each symbol's bars are read once, not once per strategy
+            futures = {executor.submit(run_symbol, symbol): symbol for symbol in SYMBOLS}
+
+            for future in as_completed(futures):
+                symbol = futures[future]
+                try:
+                    symbol_results = future.result()
+                except Exception as e:
+                    # Loading the symbol failed → every strategy on it is skipped
+                    logging.error(f"✗ {symbol} | Error: {str(e)}")
+                    pbar.update(len(STRATEGIES))
+                    continue
+
+                for strategy_name, metrics, error in symbol_results:
+                    pbar.update(1)
+                    if error is not None:
                         # Log error and skip to next combination
-                        logging.error(f"✗ {strategy_name} | {symbol} | Error: {str(e)}")
+                        logging.error(f"✗ {strategy_name} | {symbol} | Error: {error}")
                         continue
 
-                    finally:
-                        # Update progress bar
-                        pbar.update(1)
+                    # Prepare row for CSV
+                    row = {
+                        "Strategy_Name": strategy_name,
+                        "Symbol": symbol,
+                        "Total_Return": metrics["total_return_pct"],
+                        "Sharpe": metrics["sharpe"],
+                        "Max_Drawdown": metrics["max_drawdown_pct"],
+                        "Volatility": metrics["volatility_annualized"],
+                        "Win_Rate": metrics["win_rate_pct"],
+                        "Total_Trades": metrics["num_trades"]
+                    }
+
+                    # Write to CSV
+                    writer.writerow(row)
+                    rows_written += 1
+                    if rows_written % CSV_FLUSH_EVERY == 0:
+                        csvfile.flush()  # Periodic flush; the rest is flushed when the file closes
+
+                    # Log success
+                    logging.info(
+                        f"✓ {strategy_name} | {symbol} | "
+                        f"Return: {metrics['total_return_pct']:+.2f}% | "
+                        f"Sharpe: {metrics['sharpe']:.2f} | "
+                        f"Trades: {metrics['num_trades']}"
+                    )
 
     # Final summary
     logging.info(f"\n{'=' * 60}")
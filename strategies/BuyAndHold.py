@@ -3,6 +3,8 @@ from .base import Strategy
 from database.schema import Bar
 
 class BuyAndHold(Strategy):
+    __slots__ = ()
+
     def on_start(self):
         # Buy 100 shares at first bar
         pass
@@ -1,11 +1,20 @@
+import numpy as np
+
 from strategies.base import Strategy
+from strategies._kernels import sma_os_fixed_signals
 
 
 class SMA_OS_Fixed(Strategy):
     """
     Entry: SMA(10) > SMA(20) [Fresh Cross]
     Exit: Optimal Stopping with Fixed Window (N=390 bars).
+    signals() runs the same state machine as one compiled loop (Engine.run_vectorized())
     """
+    __slots__ = (
+        "fast_period", "slow_period", "window_n", "observation_idx",
+        "bars_held", "max_price_obs", "prev_bullish",
+    )
+    qty = 100  # fixed shares per entry (class constant, not a slot)
 
     def __init__(self, params=None):
         super().__init__(params)
@@ -22,12 +31,16 @@ class SMA_OS_Fixed(Strategy):
         self.max_price_obs = 0.0
         self.prev_bullish = False  # To track "Fresh" crossover
 
+    @property
+    def min_history(self) -> int:
+        """Both SMAs must be available"""
+        return max(self.fast_period, self.slow_period)
+
     def next(self, bar):
         self.update_bar(bar)
 
         # 1. Calc Indicators
-        fast = self.sma(self.fast_period)
-        slow = self.sma(self.slow_period)
+        fast, slow = self.sma_multi(self.fast_period, self.slow_period)
         if fast is None or slow is None:
             return
 
@@ -66,7 +79,7 @@ class SMA_OS_Fixed(Strategy):
             # Check for FRESH crossover: Currently Bullish AND Previously NOT Bullish
             if is_bullish and not self.prev_bullish:
                 # fixed 100 shares (portfolio will deal with insufficient fund situation
-                qty = 100
+                qty = self.qty
                 self.portfolio.buy(qty, bar.close)
                 # Initialize Exit State
                 self.bars_held = 0
@@ -77,4 +90,14 @@ class SMA_OS_Fixed(Strategy):
 
     def _reset_exit_state(self):
         self.bars_held = 0
-        self.max_price_obs = 0.0
\ No newline at end of file
+        self.max_price_obs = 0.0
+
+    def signals(self, close, high, low, ts):
+        """Whole-array form of next() → (entries, exits) for Engine.run_vectorized()"""
+        return sma_os_fixed_signals(
+            np.ascontiguousarray(close, dtype=np.float64),
+            self.fast_period,
+            self.slow_period,
+            self.window_n,
+            self.observation_idx
+        )
@@ -1,5 +1,8 @@
 from strategies.base import Strategy
-import datetime
+
+MS_PER_DAY = 86_400_000
+MS_PER_HOUR = 3_600_000
+MS_PER_MINUTE = 60_000
 
 
 class SMA_OS_Dynamic(Strategy):
@@ -8,6 +11,10 @@ class SMA_OS_Dynamic(Strategy):
     Exit: Optimal Stopping with Dynamic Window.
           Calculates N based on (Market Close Time - Current Time).
     """
+    __slots__ = (
+        "fast_period", "slow_period", "market_close_hour_utc", "close_ms_of_day",
+        "window_n", "observation_idx", "bars_held", "max_price_obs", "prev_bullish",
+    )
 
     def __init__(self, params=None):
         super().__init__(params)
@@ -19,6 +26,10 @@ class SMA_OS_Dynamic(Strategy):
         # 20:00 UTC (during Daylight Savings / Summer)
         # 21:00 UTC (during Standard Time / Winter)
         self.market_close_hour_utc = self.get_param('market_close_hour_utc', 21)
+        # Close as ms-since-midnight UTC; None for an invalid hour (→ 60 min fallback)
+        self.close_ms_of_day = (
+            self.market_close_hour_utc * MS_PER_HOUR if 0 <= self.market_close_hour_utc <= 23 else None
+        )
 
         # State
         self.window_n = 0
@@ -27,13 +38,17 @@ class SMA_OS_Dynamic(Strategy):
         self.max_price_obs = 0.0
         self.prev_bullish = False
 
+    @property
+    def min_history(self) -> int:
+        """Both SMAs must be available"""
+        return max(self.fast_period, self.slow_period)
+
     def next(self, bar):
         # 1. Update History
         self.update_bar(bar)
 
         # 2. Indicators
-        fast = self.sma(self.fast_period)
-        slow = self.sma(self.slow_period)
+        fast, slow = self.sma_multi(self.fast_period, self.slow_period)
         if fast is None or slow is None:
             return
 
@@ -97,30 +112,15 @@ class SMA_OS_Dynamic(Strategy):
     def _get_minutes_to_close(self, timestamp_ms: int) -> int:
         """
         Converts Unix Millis (UTC) to minutes remaining until Market Close (UTC).
+        Pure integer math on the timestamp — no datetime objects
         """
-        # 1. Convert ms to seconds
-        timestamp_sec = timestamp_ms / 1000.0
-
-        # 2. Create UTC Datetime object
-        dt_current = datetime.datetime.utcfromtimestamp(timestamp_sec)
-
-        # 3. Create Target Close Time for THIS specific day
-        # We replace the hour with our configured close hour (e.g., 21 for 9 PM UTC)
-        try:
-            dt_close = dt_current.replace(
-                hour=self.market_close_hour_utc,
-                minute=0,
-                second=0,
-                microsecond=0
-            )
-        except ValueError:
-            # Handle edge case: if current time is technically "tomorrow" in UTC
-            # or invalid hour, fallback to 60 mins default
+        if self.close_ms_of_day is None:
+            # Invalid close hour → fallback to 60 mins default
             return 60
 
-        # 4. Calculate Delta
-        delta = dt_close - dt_current
-        minutes = int(delta.total_seconds() / 60)
+        # Time of day (UTC) of this bar, then the distance to today's close
+        ms_of_day = timestamp_ms % MS_PER_DAY
+        remaining_ms = self.close_ms_of_day - ms_of_day
 
         # Safety: If we are somehow PAST the close (negative), return 0
-        return max(0, minutes)
\ No newline at end of file
+        return max(0, remaining_ms // MS_PER_MINUTE)
@@ -0,0 +1,258 @@
+# strategies/_kernels.py
+"""
+Compiled strategy kernels over plain float64 column arrays
+- *_signals: a strategy's next() state machine for Strategy.signals() (Engine.run_vectorized())
+- build_*: factories compiling a kernel specialized to fixed parameters (cached per parameter set)
+- sma_kernel / atr_kernel: indicator passes used by Strategy.sma()/atr() when seeding a period
+- warmup(): calls every cache=True kernel (here and in core._kernels) once before bar 1
+Numba is optional (see core._kernels) — without it they run as plain Python.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from core import _kernels as core_kernels
+from core._kernels import njit
+
+
+@njit(cache=True)
+def sma_os_fixed_signals(
+    close: np.ndarray,
+    fast_period: int,
+    slow_period: int,
+    window_n: int,
+    observation_idx: int
+):
+    """
+    SMA_OS_Fixed.next() over the whole close array → (entries, exits) boolean arrays
+    - SMAs kept as running sums (add the entering close, subtract the leaving one)
+    - Assumes every entry fills (fixed qty, enough cash) — same as simulate_signals()
+    - prev_bullish only advances while flat, exactly like next()
+    """
+    n = close.size
+    entries = np.zeros(n, dtype=np.bool_)
+    exits = np.zeros(n, dtype=np.bool_)
+    inv_fast = 1.0 / fast_period  # SMA = sum * (1 / period), as in Strategy.sma()
+    inv_slow = 1.0 / slow_period
+
+    fast_sum = 0.0
+    slow_sum = 0.0
+    invested = False
+    prev_bullish = False
+    bars_held = 0
+    max_price_obs = 0.0
+
+    for i in range(n):
+        c = close[i]
+        fast_sum += c
+        slow_sum += c
+        if i >= fast_period:
+            fast_sum -= close[i - fast_period]
+        if i >= slow_period:
+            slow_sum -= close[i - slow_period]
+        if i + 1 < fast_period or i + 1 < slow_period:
+            continue  # warm-up: SMA not ready yet
+
+        if invested:
+            bars_held += 1
+
+            # Phase A: Observation
+            if bars_held <= observation_idx:
+                if c > max_price_obs:
+                    max_price_obs = c
+
+            # Phase B: Selection
+            elif bars_held <= window_n:
+                if c > max_price_obs:
+                    exits[i] = True
+                    invested = False
+                    bars_held = 0
+                    max_price_obs = 0.0
+                    continue
+
+            # Phase C: Time limit
+            if bars_held >= window_n:
+                exits[i] = True
+                invested = False
+                bars_held = 0
+                max_price_obs = 0.0
+                continue
+
+        else:
+            is_bullish = fast_sum * inv_fast > slow_sum * inv_slow
+            if is_bullish and not prev_bullish:
+                entries[i] = True
+                invested = True
+                bars_held = 0
+                max_price_obs = -1.0
+            prev_bullish = is_bullish
+
+    return entries, exits
+
+
+@njit(cache=True)
+def sma_atr_exit_signals(
+    close: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    fast_period: int,
+    slow_period: int,
+    atr_period: int,
+    atr_multiplier: float
+):
+    """
+    SMA_ATR_Exit.next() fused into one pass → (entries, exits) boolean arrays
+    - Both SMAs (running sums), Wilder ATR and the trailing stop share one loop
+    - Assumes every entry fills (fixed qty, enough cash) — same as simulate_signals()
+    - A bar that hits the stop never re-enters (next() sees the pre-sell position)
+    """
+    n = close.size
+    entries = np.zeros(n, dtype=np.bool_)
+    exits = np.zeros(n, dtype=np.bool_)
+    warmup = max(fast_period, slow_period, atr_period + 1)
+    inv_fast = 1.0 / fast_period  # SMA = sum * (1 / period), as in Strategy.sma()
+    inv_slow = 1.0 / slow_period
+
+    fast_sum = 0.0
+    slow_sum = 0.0
+    atr = 0.0
+    tr_count = 0
+    invested = False
+    prev_bullish = False
+    trailing_stop = 0.0
+
+    for i in range(n):
+        c = close[i]
+        fast_sum += c
+        slow_sum += c
+        if i >= fast_period:
+            fast_sum -= close[i - fast_period]
+        if i >= slow_period:
+            slow_sum -= close[i - slow_period]
+        if i > 0:
+            prev_close = close[i - 1]
+            # TR = Max(High-Low, |High-PrevClose|, |Low-PrevClose|)
+            tr = max(high[i] - low[i], abs(high[i] - prev_close), abs(low[i] - prev_close))
+            tr_count += 1
+            if tr_count < atr_period:
+                atr += tr
+            elif tr_count == atr_period:
+                atr = (atr + tr) / atr_period
+            else:
+                atr = (atr * (atr_period - 1) + tr) / atr_period
+        if i + 1 < warmup:
+            continue  # warm-up: SMAs / ATR not ready yet
+
+        is_bullish = fast_sum * inv_fast > slow_sum * inv_slow
+        if i + 1 == warmup:  # first valid bar only initializes the state
+            prev_bullish = is_bullish
+            continue
+
+        was_invested = invested
+        if was_invested:
+            # Ratchet the stop up, then check whether the low hit it
+            trailing_stop = max(trailing_stop, c - atr * atr_multiplier)
+            if low[i] <= trailing_stop:
+                exits[i] = True
+                invested = False
+                trailing_stop = 0.0
+
+        if is_bullish and not prev_bullish and not was_invested:
+            entries[i] = True
+            invested = True
+            trailing_stop = c - atr * atr_multiplier  # initial stop, set on entry
+
+        prev_bullish = is_bullish
+
+    return entries, exits
+
+
+@lru_cache(maxsize=None)
+def build_sma_cross_signals(fast_period: int, slow_period: int):
+    """
+    SMACrossover.next() kernel with both periods baked in as compile-time constants
+    → close array → (entries, exits); compiled once per (fast, slow) pair in this process
+    Closures are not disk-cacheable in Numba, hence no cache=True here
+    """
+    warmup = max(fast_period, slow_period)
+    inv_fast = 1.0 / fast_period
+    inv_slow = 1.0 / slow_period
+
+    @njit
+    def sma_cross_signals(close: np.ndarray):
+        n = close.size
+        entries = np.zeros(n, dtype=np.bool_)
+        exits = np.zeros(n, dtype=np.bool_)
+
+        fast_sum = 0.0
+        slow_sum = 0.0
+        prev_bullish = False
+        for i in range(n):
+            c = close[i]
+            fast_sum += c
+            slow_sum += c
+            if i >= fast_period:
+                fast_sum -= close[i - fast_period]
+            if i >= slow_period:
+                slow_sum -= close[i - slow_period]
+            if i + 1 < warmup:
+                continue  # warm-up: SMA not ready yet
+
+            is_bullish = fast_sum * inv_fast > slow_sum * inv_slow
+            if i + 1 > warmup:  # first valid bar only initializes the state
+                if is_bullish and not prev_bullish:
+                    entries[i] = True  # fresh golden cross
+                elif not is_bullish and prev_bullish:
+                    exits[i] = True  # fresh death cross
+            prev_bullish = is_bullish
+
+        return entries, exits
+
+    return sma_cross_signals
+
+
+@njit(cache=True)
+def sma_kernel(closes: np.ndarray, period: int) -> float:
+    """Mean of the last min(period, len) values (0.0 for an empty array) — plain summing loop"""
+    n = closes.size
+    start = n - period if n > period else 0
+    total = 0.0
+    for i in range(start, n):
+        total += closes[i]
+    return total / (n - start) if n > start else 0.0
+
+
+@njit(cache=True)
+def atr_kernel(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int):
+    """
+    Wilder ATR over whole arrays → (value, tr_count), the Strategy ATR state
+    value is the plain TR sum while tr_count < period (seed window not full yet)
+    """
+    value = 0.0
+    count = 0
+    for i in range(1, close.size):
+        prev_close = close[i - 1]
+        # TR = Max(High-Low, |High-PrevClose|, |Low-PrevClose|)
+        tr = max(high[i] - low[i], abs(high[i] - prev_close), abs(low[i] - prev_close))
+        count += 1
+        if count < period:
+            value += tr
+        elif count == period:
+            value = (value + tr) / period
+        else:
+            value = (value * (period - 1) + tr) / period
+    return value, count
+
+
+def warmup() -> None:
+    """
+    Compile (or load from the Numba cache) every registered kernel on float64 dummies of
+    shape 32 — int periods / float multipliers as the strategies pass them
+    build_*() kernels depend on their parameters and compile on first use instead
+    """
+    dummy = np.ones(32, dtype=np.float64)
+    sma_kernel(dummy, 10)
+    atr_kernel(dummy, dummy, dummy, 14)
+    sma_os_fixed_signals(dummy, 10, 20, 390, 144)
+    sma_atr_exit_signals(dummy, dummy, dummy, 10, 20, 14, 3.0)
+    core_kernels.warmup()
@@ -1,11 +1,12 @@
 # strategies/base.py
-from typing import Any, Dict, Optional, Deque
+from typing import Any, Dict, List, Optional, Tuple
 from abc import ABC, abstractmethod
-from collections import deque
-import statistics
+import numpy as np
 
 from database.schema import Bar
 from core.portfolio import Portfolio
+from strategies import _kernels
+from strategies._kernels import sma_kernel, atr_kernel
 
 
 class Strategy(ABC):
@@ -18,11 +19,22 @@ class Strategy(ABC):
     Optional overrides:
         - on_start()     → called once at beginning
         - on_end()       → called once at end
+        - signals()      → whole-array entries/exits for Engine.run_vectorized()
 
     Strategy has full access to:
         self.portfolio   → buy(), sell(), sell_all(), cash, position, etc.
         self.bar         → current bar (convenience)
+        self.closes / highs / lows → stored history as float64 columns, oldest first
+
+    State lives in __slots__ (no per-instance __dict__); a subclass that declares its own
+    __slots__ stays dict-free, one that doesn't simply gets a __dict__ back as usual
     """
+    __slots__ = (
+        "params", "portfolio", "bar",
+        "_lookback", "_close_buf", "_high_buf", "_low_buf", "_head", "_count",
+        "bar_index", "_pushed_index",
+        "_sma_sums", "_sma_inv", "_atr_state", "_prev_close",
+    )
 
     def __init__(self, params: Optional[Dict[str, Any]] = None):
         """
@@ -35,9 +47,28 @@ class Strategy(ABC):
         # Event - Driven Data Series
         # To calculate whether the conditions are fulfilled or not, some history data
         # should be stored.
-        # "maxlen" automatically drops old data when new data is appended.
+        # Preallocated ring buffers (one float column per field) — the oldest value is
+        # overwritten once `max_lookback` bars are stored
         self._lookback = self.params.get('max_lookback', 300)
-        self.history: Deque = deque(maxlen=self._lookback)
+        self._close_buf = np.empty(self._lookback, dtype=np.float64)
+        self._high_buf = np.empty(self._lookback, dtype=np.float64)
+        self._low_buf = np.empty(self._lookback, dtype=np.float64)
+        self._head = 0   # next write slot
+        self._count = 0  # bars pushed so far (stored = min(_count, _lookback))
+        # Sequence number of the current bar, bumped by Engine once per bar (None outside Engine)
+        # → update_bar() pushes each bar once however often it is called; timestamps play no part
+        self.bar_index: Optional[int] = None
+        self._pushed_index: Optional[int] = None  # bar_index of the last bar pushed into history
+
+        # Running-sum SMA per period, registered lazily by sma() and updated in update_bar()
+        # (the leaving close is read back from the ring buffer → no per-period window)
+        self._sma_sums: Dict[int, float] = {}
+        self._sma_inv: Dict[int, float] = {}  # 1.0 / period, fixed at registration → SMA = sum * inv
+
+        # Wilder ATR state per period → [value, tr_count]; value is the plain TR sum until
+        # `period` TRs are seen, then the smoothed ATR. Registered lazily by atr()
+        self._atr_state: Dict[int, List[float]] = {}
+        self._prev_close: Optional[float] = None
 
 
     # ------------------------------------------------------------------
@@ -47,15 +78,61 @@ class Strategy(ABC):
         """
         Called once before the first bar
         Use for: indicator initialization, warm-up, logging
+        Base version compiles the indicator kernels up front (see warmup())
+        """
+        self.warmup()
+
+    @classmethod
+    def warmup(cls) -> None:
+        """
+        Run every compiled kernel once on dummy arrays (_kernels.warmup()) → JIT compile
+        (or cache load) happens here instead of inside the first bar; a no-op cost once
+        compiled in this process
         """
-        pass
+        _kernels.warmup()
 
     def update_bar(self, bar) -> None:
         """
         Helper: Must be called at the start of next() to update history.
+        Idempotent per Engine bar (bar_index) — the Engine already calls it before next(), so
+        the strategy's own call must not push the same bar into history twice
+        Bars sharing a timestamp are still separate bars; without an Engine every call pushes
         """
+        index = self.bar_index
+        if index is not None:
+            if index == self._pushed_index:
+                return
+            self._pushed_index = index
         self.bar = bar
-        self.history.append(bar)
+
+        # O(1) SMA update per registered period: add the entering close, subtract the leaving one
+        # (read before the write below — for period == max_lookback it sits in the slot reused now)
+        close = bar.close
+        head = self._head
+        count = self._count
+        close_buf = self._close_buf
+        sums = self._sma_sums
+        for period in sums:
+            if count >= period:
+                sums[period] += close - close_buf.item(head - period)  # negative index wraps
+            else:
+                sums[period] += close
+
+        close_buf[head] = close
+        self._high_buf[head] = bar.high
+        self._low_buf[head] = bar.low
+        head += 1
+        self._head = head if head < self._lookback else 0
+        self._count = count + 1
+
+        # O(1) Wilder ATR update per registered period
+        prev_close = self._prev_close
+        if prev_close is not None and self._atr_state:
+            # TR = Max(High-Low, |High-PrevClose|, |Low-PrevClose|)
+            tr = max(bar.high - bar.low, abs(bar.high - prev_close), abs(bar.low - prev_close))
+            for period, state in self._atr_state.items():
+                self._wilder_step(state, period, tr)
+        self._prev_close = close
 
     @abstractmethod
     def next(self, bar: Bar) -> None:
@@ -74,6 +151,21 @@ class Strategy(ABC):
         if self.portfolio and self.bar and self.portfolio.is_long:
             self.portfolio.sell_all(self.bar.close)
 
+    def signals(
+        self,
+        close: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        ts: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Optional vectorized form of next() — used by Engine.run_vectorized()
+        Receives the full column arrays of the backtest (ts = Unix ms)
+        Returns boolean (entries, exits) arrays aligned with close;
+        fills happen at close with a fixed `qty` (default 100) shares
+        """
+        raise NotImplementedError(f"{self.name} does not implement signals()")
+
     # ------------------------------------------------------------------
     # Helper methods — make strategy code cleaner
     # ------------------------------------------------------------------
@@ -82,43 +174,124 @@ class Strategy(ABC):
         return self.params.get(name, default)
 
     # --- Helpers ---
+    def _last(self, buf: np.ndarray, n: int) -> np.ndarray:
+        """
+        Last `n` stored values of a ring buffer, oldest first (fewer if not stored yet)
+        A view when the range does not wrap, else one contiguous copy
+        """
+        n = min(n, self._count, self._lookback)
+        start = self._head - n
+        if start >= 0:
+            return buf[start:self._head]
+        return np.concatenate((buf[start:], buf[:self._head]))
+
     def sma(self, period: int) -> Optional[float]:
-        """Calculates SMA using the .close attribute of stored bars."""
-        if len(self.history) < period:
+        """
+        SMA of the last `period` closes — O(1): a running sum kept up to date by update_bar()
+        First call for a period registers it, priming the sum from the close buffer
+        """
+        if period > self._lookback:
+            return None  # window never fits the stored history
+        total = self._sma_sums.get(period)
+        if total is None:
+            closes = self._last(self._close_buf, period)
+            total = self._sma_sums[period] = sma_kernel(closes, period) * closes.size
+            self._sma_inv[period] = 1.0 / period
+        if self._count < period:
             return None
-        # Extract closing prices from the last N bars
-        closes = [b.close for b in list(self.history)[-period:]]
-        return statistics.mean(closes)
+        return total * self._sma_inv[period]
+
+    def sma_multi(self, *periods: int) -> Tuple[Optional[float], ...]:
+        """
+        Several SMAs in one call, e.g. fast, slow = self.sma_multi(10, 20)
+        Each is the O(1) running sum of sma(); registration is shared with sma()
+        """
+        sums = self._sma_sums
+        inv = self._sma_inv
+        count = self._count
+        lookback = self._lookback
+        return tuple(
+            sums[p] * inv[p] if p in sums and count >= p and p <= lookback else self.sma(p)
+            for p in periods
+        )
 
     def atr(self, period: int) -> Optional[float]:
         """
-        Calculates Average True Range (ATR).
-        Logic: Average of the True Ranges over N periods.
+        Average True Range with Wilder's smoothing — O(1), maintained by update_bar()
+        Seed = mean of the first `period` TRs, then ATR_t = (ATR_{t-1}*(period-1) + TR_t) / period
+        First call for a period registers it, seeding from the TRs available in the ring buffers
+        → identical to tracking it from bar 1 only while nothing has been overwritten
+          (_count <= max_lookback); call atr(period) once up front (e.g. in __init__) to be exact
         """
-        if len(self.history) < period + 1:
+        state = self._atr_state.get(period)
+        if state is None:
+            state = self._atr_state[period] = self._seed_atr(period)
+        if state[1] < period:
             return None
+        return state[0]
 
-        # We need the last N+1 bars to calculate N True Ranges
-        # (because TR requires previous close)
-        recent_bars = list(self.history)[-(period + 1):]
-        true_ranges = []
-
-        for i in range(1, len(recent_bars)):
-            curr = recent_bars[i]
-            prev = recent_bars[i - 1]
-
-            # TR = Max(High-Low, |High-PrevClose|, |Low-PrevClose|)
-            val1 = curr.high - curr.low
-            val2 = abs(curr.high - prev.close)
-            val3 = abs(curr.low - prev.close)
-
-            true_ranges.append(max(val1, val2, val3))
+    def _seed_atr(self, period: int) -> List[float]:
+        """
+        [value, tr_count] ATR state over the stored bars — one compiled Wilder pass
+        Bars already dropped from the ring buffer are not part of the seed
+        """
+        value, count = atr_kernel(self.highs, self.lows, self.closes, period)
+        return [value, count]
 
-        return statistics.mean(true_ranges)
+    @staticmethod
+    def _wilder_step(state: List[float], period: int, tr: float) -> None:
+        """Fold one True Range into a [value, tr_count] ATR state"""
+        count = state[1] + 1
+        state[1] = count
+        if count < period:
+            state[0] += tr  # still summing the seed window
+        elif count == period:
+            state[0] = (state[0] + tr) / period  # seed: simple mean of the first `period` TRs
+        else:
+            state[0] = (state[0] * (period - 1) + tr) / period
 
     # ------------------------------------------------------------------
     # Optional: convenience properties
     # ------------------------------------------------------------------
+    @property
+    def closes(self) -> np.ndarray:
+        """Stored closes (up to max_lookback), oldest first — a view unless the ring has wrapped"""
+        return self._last(self._close_buf, self._lookback)
+
+    @property
+    def highs(self) -> np.ndarray:
+        """Stored highs, aligned with closes"""
+        return self._last(self._high_buf, self._lookback)
+
+    @property
+    def lows(self) -> np.ndarray:
+        """Stored lows, aligned with closes"""
+        return self._last(self._low_buf, self._lookback)
+
+    @property
+    def min_history(self) -> int:
+        """
+        Bars needed before next() can act (indicator warm-up) — Engine skips next() until then
+        override in subclass; 0 → next() runs from the first bar
+        """
+        return 0
+
+    @property
+    def supports_signals(self) -> bool:
+        """
+        signals() is implemented and matches next() for these params:
+        - signals() and next() come from the same class (a subclass that overrides only
+          next() must not be replaced by its parent's signals())
+        - min_history fits the ring buffer (sma() returns None for a period > max_lookback
+          → next() never trades)
+        """
+        signals_owner = _defining_class(type(self), "signals")
+        return (
+            signals_owner is not Strategy
+            and signals_owner is _defining_class(type(self), "next")
+            and self.min_history <= self._lookback
+        )
+
     @property
     def name(self) -> str:
         """Human-readable name — override in subclass"""
@@ -126,3 +299,8 @@ class Strategy(ABC):
 
     def __str__(self) -> str:
         return f"{self.name}({self.params})"
+
+
+def _defining_class(cls: type, attr: str) -> type:
+    """First class in cls's MRO whose own namespace defines `attr`"""
+    return next(klass for klass in cls.__mro__ if attr in vars(klass))
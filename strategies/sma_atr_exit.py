@@ -1,7 +1,18 @@
 from strategies.base import Strategy
+from strategies._kernels import sma_atr_exit_signals
 
 
 class SMA_ATR_Exit(Strategy):
+    """
+    Entry: SMA(10) > SMA(20) [Fresh Cross]
+    Exit: ATR trailing stop (close - atr_mult * ATR(atr_period), only ratchets up)
+    signals() runs SMAs, ATR and the stop as one fused compiled loop (Engine.run_vectorized())
+    """
+    __slots__ = (
+        "fast_period", "slow_period", "qty", "atr_period", "atr_multiplier",
+        "prev_bullish", "trailing_stop_price",
+    )
+
     def __init__(self, params=None):
         super().__init__(params)
 
@@ -13,18 +24,23 @@ class SMA_ATR_Exit(Strategy):
         # Exit Params (ATR)
         self.atr_period = self.get_param('atr_period', 14)
         self.atr_multiplier = self.get_param('atr_mult', 3.0)
+        self.atr(self.atr_period)  # register now → Wilder state tracked from bar 1, never seeded late
 
         # State
         self.prev_bullish = None
         self.trailing_stop_price = 0.0
 
+    @property
+    def min_history(self) -> int:
+        """Both SMAs and the ATR (period + 1 bars for period TRs) must be available"""
+        return max(self.fast_period, self.slow_period, self.atr_period + 1)
+
     def next(self, bar):
         # 1. Update History (Stores full Bar object now)
         self.update_bar(bar)
 
         # 2. Calculate Indicators
-        sma_fast = self.sma(self.fast_period)
-        sma_slow = self.sma(self.slow_period)
+        sma_fast, sma_slow = self.sma_multi(self.fast_period, self.slow_period)
         atr_value = self.atr(self.atr_period)
 
         # Ensure we have enough data
@@ -47,9 +63,8 @@ class SMA_ATR_Exit(Strategy):
             # Logic: We want the stop to be below the current price by N * ATR
             potential_new_stop = bar.close - (atr_value * self.atr_multiplier)
 
-            # 2. Ratchet Logic: Only move stop UP, never down.
-            if potential_new_stop > self.trailing_stop_price:
-                self.trailing_stop_price = potential_new_stop
+            # 2. Ratchet Logic: Only move stop UP, never down (running max).
+            self.trailing_stop_price = max(self.trailing_stop_price, potential_new_stop)
 
             # 3. Check if HIT (If Low dipped below our stop)
             if bar.low <= self.trailing_stop_price:
@@ -71,4 +86,11 @@ class SMA_ATR_Exit(Strategy):
                 self.trailing_stop_price = bar.close - (atr_value * self.atr_multiplier)
 
         # Update state
-        self.prev_bullish = is_bullish
\ No newline at end of file
+        self.prev_bullish = is_bullish
+
+    def signals(self, close, high, low, ts):
+        """Whole-array form of next() → (entries, exits) for Engine.run_vectorized()"""
+        return sma_atr_exit_signals(
+            close, high, low,
+            self.fast_period, self.slow_period, self.atr_period, float(self.atr_multiplier)
+        )
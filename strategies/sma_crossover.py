@@ -1,7 +1,10 @@
 from strategies.base import Strategy
+from strategies._kernels import build_sma_cross_signals
 
 
 class SMACrossover(Strategy):
+    __slots__ = ("fast_period", "slow_period", "qty", "prev_bullish")
+
     def __init__(self, params=None):
         super().__init__(params)
         self.fast_period = self.get_param('fast', 10)
@@ -12,13 +15,17 @@ class SMACrossover(Strategy):
         # We initialize as None so we don't trigger a trade on the very first bar
         self.prev_bullish = None
 
+    @property
+    def min_history(self) -> int:
+        """Both SMAs must be available"""
+        return max(self.fast_period, self.slow_period)
+
     def next(self, bar):
         # 1. CRITICAL: Update history first
         self.update_bar(bar)
 
         # 2. Calculate Indicators
-        sma_fast = self.sma(self.fast_period)
-        sma_slow = self.sma(self.slow_period)
+        sma_fast, sma_slow = self.sma_multi(self.fast_period, self.slow_period)
 
         # We need both to exist to proceed
         if sma_fast is None or sma_slow is None:
@@ -51,4 +58,13 @@ class SMACrossover(Strategy):
                 self.portfolio.sell(current_pos, bar.close)
 
         # 5. Update State for next bar
-        self.prev_bullish = is_bullish
\ No newline at end of file
+        self.prev_bullish = is_bullish
+
+    def signals(self, close, high, low, ts):
+        """
+        Whole-array form of next() → (entries, exits) for Engine.run_vectorized()
+        Fresh golden cross → entry, fresh death cross → exit; the first bar with both SMAs
+        only initializes the state (no signal), as in next()
+        """
+        # Kernel specialized to (fast, slow) — built on first use, shared by every instance
+        return build_sma_cross_signals(self.fast_period, self.slow_period)(close)
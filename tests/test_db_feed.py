@@ -0,0 +1,47 @@
+# tests/test_db_feed.py
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from database.schema import SQLITE_CREATE_TABLE
+from datafeed.db_feed import open_read_connection
+
+INSERT_BAR = "INSERT INTO bars VALUES ('TEST', ?, 1.0, 1.0, 1.0, 1.0, 1.0)"
+COUNT_BARS = "SELECT count(*) FROM bars"
+
+
+class ReadConnectionTest(unittest.TestCase):
+    """Reader connections of different modes on one file must not share state"""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self._tmp.name) / "bars.sqlite"
+        self.writer = sqlite3.connect(self.db_path)
+        self.writer.execute("PRAGMA journal_mode = WAL;")
+        self.writer.executescript(SQLITE_CREATE_TABLE)
+        self.writer.execute(INSERT_BAR, (1,))
+        self.writer.commit()
+        self.writer.execute("PRAGMA wal_checkpoint(TRUNCATE);")  # immutable readers ignore the WAL
+
+    def tearDown(self):
+        self.writer.close()
+        self._tmp.cleanup()
+
+    def test_mutable_reader_sees_commits_after_immutable_open(self):
+        immutable = open_read_connection(self.db_path, immutable=True)
+        mutable = open_read_connection(self.db_path, immutable=False)
+        try:
+            self.assertEqual(immutable.execute(COUNT_BARS).fetchone()[0], 1)
+            self.assertEqual(mutable.execute(COUNT_BARS).fetchone()[0], 1)
+
+            self.writer.execute(INSERT_BAR, (2,))
+            self.writer.commit()
+            self.assertEqual(mutable.execute(COUNT_BARS).fetchone()[0], 2)
+        finally:
+            immutable.close()
+            mutable.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+# tests/test_strategy_base.py
+import unittest
+
+from core.engine import Engine
+from database.schema import Bar
+from strategies.base import Strategy
+
+
+class ListFeed:
+    """Minimal iteration-only feed over a fixed list of bars"""
+
+    def __init__(self, bars, symbol="TEST"):
+        self.bars = bars
+        self.symbol = symbol
+
+    def __iter__(self):
+        return iter(self.bars)
+
+
+class RecordingStrategy(Strategy):
+    """Calls update_bar() itself (as the bundled strategies do) and keeps its final history"""
+    recorded = None
+
+    def next(self, bar):
+        self.update_bar(bar)
+
+    def on_end(self):
+        RecordingStrategy.recorded = self.closes.tolist()
+
+
+def make_bar(dt, close):
+    return Bar("TEST", dt, close, close, close, close, 1.0)
+
+
+class UpdateBarTest(unittest.TestCase):
+    def run_bars(self, bars):
+        Engine(feed=ListFeed(bars), strategy_class=RecordingStrategy).run()
+        return RecordingStrategy.recorded
+
+    def test_engine_and_next_push_each_bar_once(self):
+        closes = self.run_bars([make_bar(60_000 * i, float(i)) for i in range(5)])
+        self.assertEqual(closes, [0.0, 1.0, 2.0, 3.0, 4.0])
+
+    def test_duplicate_timestamps_are_kept(self):
+        closes = self.run_bars([make_bar(0, 1.0), make_bar(60_000, 2.0), make_bar(60_000, 3.0)])
+        self.assertEqual(closes, [1.0, 2.0, 3.0])
+
+    def test_first_bar_without_datetime_is_kept(self):
+        strategy = RecordingStrategy()
+        for index, bar in enumerate([make_bar(None, 1.0), make_bar(60_000, 2.0)], start=1):
+            strategy.bar_index = index  # what Engine.run() does before each bar
+            strategy.update_bar(bar)
+            strategy.update_bar(bar)
+        self.assertEqual(strategy.closes.tolist(), [1.0, 2.0])
+
+    def test_outside_engine_every_call_pushes(self):
+        strategy = RecordingStrategy()
+        bar = make_bar(0, 1.0)
+        strategy.update_bar(bar)
+        strategy.update_bar(bar)
+        self.assertEqual(strategy.closes.tolist(), [1.0, 1.0])
+
+
+if __name__ == "__main__":
+    unittest.main()